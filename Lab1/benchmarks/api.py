@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from sqlalchemy.dialects.postgresql import insert
+
+from benchmarks.harness import Scenario, run_scenario
+from core.depends import connection
+from main import app
+from profiles.models import Skill
+
+# Drives main.app in process through httpx.ASGITransport, so the numbers cover
+# the whole stack from middlewares to the database but no network. The
+# database from APP_DATABASE_URI has to be migrated, the fixture is created
+# through the API with unique emails and can be run against a seeded database.
+#
+#   python -m benchmarks.api --requests 500 --concurrency 20
+#   python -m benchmarks.api --baseline benchmarks/results/<earlier run>.json
+
+PASSWORD = "benchmark"
+SKILLS = ("python", "go", "rust", "java", "sql", "docker", "kubernetes", "react")
+WORDS = ("python", "backend", "systems", "frontend", "data", "ml", "devops", "cloud")
+LEVELS = ("beginner", "intermediate", "advanced")
+
+
+@dataclass
+class Fixture:
+    emails: list[str]
+    headers: list[dict[str, str]]
+    team_id: int
+    member_ids: list[int]
+
+
+async def prepare_fixture(client: httpx.AsyncClient, users: int) -> Fixture:
+    async with connection.get_sesion() as session:
+        stmt = insert(Skill).values([{"name": name} for name in SKILLS])
+        await session.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+        await session.commit()
+
+    response = await client.get("/profiles/skills")
+    skill_ids = [skill["id"] for skill in response.json()["skills"]]
+
+    rng = random.Random(0)
+    run_id = uuid.uuid4().hex[:8]
+    emails, headers, user_ids = [], [], []
+    for i in range(users):
+        email = f"bench-{run_id}-{i}@example.com"
+        response = await client.post(
+            "/users/sign-up",
+            json={"email": email, "password": PASSWORD},
+        )
+
+        response.raise_for_status()
+        emails.append(email)
+        headers.append({"Authorization": f"Bearer {response.json()['token']}"})
+        user_ids.append(response.json()["user"]["id"])
+
+        profile = {
+            "first_name": f"User{i}",
+            "last_name": "Benchmark",
+            "birthdate": "1995-01-01",
+            "about_me": " ".join(rng.sample(WORDS, 3)),
+            "work_experience": rng.randrange(120),
+        }
+
+        skills = [
+            {"skill_id": skill_id, "level": rng.choice(LEVELS)}
+            for skill_id in rng.sample(skill_ids, 3)
+        ]
+
+        await client.post("/profiles/me", headers=headers[i], json=profile)
+        await client.put(
+            "/profiles/me/skills",
+            headers=headers[i],
+            json={"skills": skills},
+        )
+
+    owner = headers[0]
+    response = await client.post("/teams/", headers=owner, json={"name": run_id})
+    team_id = response.json()["id"]
+
+    members = [{"user_id": user_id, "role": "programmer"} for user_id in user_ids[1:]]
+    await client.post(
+        f"/teams/{team_id}/members/bulk",
+        headers=owner,
+        json={"members": members},
+    )
+
+    response = await client.get(f"/teams/{team_id}/members", headers=owner)
+    member_ids = [member["id"] for member in response.json()["members"]]
+    tasks = [
+        {"member_id": rng.choice(member_ids), "description": f"task {i}"}
+        for i in range(users * 5)
+    ]
+
+    await client.post(
+        f"/teams/{team_id}/tasks/bulk",
+        headers=owner,
+        json={"tasks": tasks},
+    )
+
+    response = await client.post(
+        "/projects/",
+        headers=owner,
+        json={"name": run_id, "description": ""},
+    )
+
+    project_id = response.json()["id"]
+    await client.post(f"/projects/{project_id}/teams/{team_id}", headers=owner)
+    return Fixture(emails, headers, team_id, member_ids)
+
+
+def build_scenarios(fixture: Fixture) -> list[Scenario]:
+    users = len(fixture.headers)
+    team_id = fixture.team_id
+
+    def headers(i: int) -> dict[str, str]:
+        return fixture.headers[i % users]
+
+    def member_id(i: int) -> int:
+        return fixture.member_ids[i % len(fixture.member_ids)]
+
+    return [
+        Scenario(
+            "sign_in",
+            lambda client, i: client.post(
+                "/users/sign-in",
+                json={"email": fixture.emails[i % users], "password": PASSWORD},
+            ),
+        ),
+        Scenario(
+            "profile_me",
+            lambda client, i: client.get("/profiles/me", headers=headers(i)),
+        ),
+        Scenario(
+            "allowed_projects",
+            lambda client, i: client.get("/projects/", headers=headers(i)),
+        ),
+        Scenario(
+            "profile_search",
+            lambda client, i: client.get(
+                "/profiles/",
+                params={"skills": ["python", "go"], "interests": ["backend"]},
+            ),
+        ),
+        Scenario(
+            "profile_search_all_skills",
+            lambda client, i: client.get(
+                "/profiles/",
+                params={
+                    "skills": ["python", "sql"],
+                    "skills_match": "all",
+                    "min_level": "intermediate",
+                },
+            ),
+        ),
+        Scenario(
+            "team_members",
+            lambda client, i: client.get(
+                f"/teams/{team_id}/members",
+                headers=headers(i),
+            ),
+        ),
+        Scenario(
+            "member_tasks",
+            lambda client, i: client.get(
+                f"/teams/{team_id}/members/{member_id(i)}/tasks",
+                headers=headers(i),
+            ),
+        ),
+        Scenario(
+            "team_tasks",
+            lambda client, i: client.get(
+                f"/teams/{team_id}/tasks",
+                headers=headers(i),
+                params={"status": ["not_started", "in_progress"]},
+            ),
+        ),
+        Scenario(
+            "create_task",
+            lambda client, i: client.post(
+                f"/teams/{team_id}/tasks",
+                headers=headers(i),
+                json={"member_id": member_id(i)},
+            ),
+        ),
+        Scenario(
+            "update_profile",
+            lambda client, i: client.patch(
+                "/profiles/me",
+                headers=headers(i),
+                json={"work_experience": i % 120},
+            ),
+        ),
+    ]
+
+
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_per_request")
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"\n{'scenario':<28}" + "".join(f"{key:>24}" for key in COMPARED))
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is not None:
+            changes = [_change(before[key], result[key]) for key in COMPARED]
+            print(f"{name:<28}" + "".join(f"{change:>24}" for change in changes))
+
+
+def _change(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return f"{after}"
+
+    return f"{after} ({(after - before) / before:+.0%})"
+
+
+async def main(args: argparse.Namespace) -> dict:
+    # failing requests are counted as errors instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+        ) as client:
+            fixture = await prepare_fixture(client, args.users)
+            scenarios = [
+                scenario
+                for scenario in build_scenarios(fixture)
+                if not args.scenario or scenario.name in args.scenario
+            ]
+
+            results = {}
+            for scenario in scenarios:
+                # warm up the pools, caches and prepared statements
+                await run_scenario(client, scenario, args.concurrency, args.concurrency)
+                result = await run_scenario(
+                    client,
+                    scenario,
+                    args.requests,
+                    args.concurrency,
+                )
+
+                results[scenario.name] = result.summary()
+                print(f"{scenario.name:<28}{json.dumps(results[scenario.name])}")
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "users": args.users,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lab1 API benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", action="append", help="repeatable")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, help="earlier result to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    output = args.output or Path(
+        "benchmarks/results",
+        f"api-{time.strftime('%Y%m%d-%H%M%S')}.json",
+    )
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nsaved to {output}")
+
+    if args.baseline is not None:
+        compare(report["results"], json.loads(args.baseline.read_text()))
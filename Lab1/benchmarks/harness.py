@@ -0,0 +1,83 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+type Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Request
+    # expected status codes, anything else is counted as an error
+    statuses: tuple[int, ...] = (200,)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    statements: list[int] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        throughput = requests / self.elapsed if self.elapsed else 0.0
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput_rps": round(throughput, 1),
+            "mean_ms": round(sum(latencies) / requests * 1000, 3) if requests else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "queries_per_request": (
+                round(sum(self.statements) / len(self.statements), 2)
+                if self.statements
+                else None
+            ),
+        }
+
+
+def percentile(ordered: list[float], rank: float) -> Optional[float]:
+    # nearest rank, in milliseconds
+    if not ordered:
+        return None
+
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return round(ordered[index] * 1000, 3)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> ScenarioResult:
+    result = ScenarioResult(scenario.name)
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            started_at = time.perf_counter()
+            response = await scenario.request(client, i)
+            result.latencies.append(time.perf_counter() - started_at)
+
+            if response.status_code not in scenario.statuses:
+                result.errors += 1
+
+            # set by QueryStatsMiddleware when SQL_STATS_HEADERS is on
+            statements = response.headers.get("x-db-statements")
+            if statements is not None:
+                result.statements.append(int(statements))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started_at
+    return result
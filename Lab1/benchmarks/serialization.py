@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import platform
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from pydantic_core import to_json
+
+from core.dtos import CoreDTO
+from main import app
+from profiles.dtos import ProfileDTO, ProfileListDTO, SkillDTO
+from projects.dtos import ProjectListDTO, ProjectTeamsDTO
+from teams.dtos import MemberDTO, MemberListDTO, TaskBoardDTO, TaskDTO, TeamDTO
+from teams.models import Role, TaskStatus
+from users.dtos import UserDTO
+
+# Response serialization alone, for the large list endpoints: FastAPI's own
+# path (validation against response_model, or jsonable_encoder without one,
+# then JSONResponse) against the one of FastJSONRoute. No database is needed,
+# the payloads are built in memory.
+#
+#   python -m benchmarks.serialization --items 10 100 1000
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def user(i: int) -> UserDTO:
+    return UserDTO(id=i, email=f"user{i}@example.com")
+
+
+def member(i: int) -> MemberDTO:
+    return MemberDTO(id=i, user=user(i), role=Role.PROGRAMMER)
+
+
+def profiles(items: int) -> ProfileListDTO:
+    skills = [SkillDTO(id=i, name=f"skill-{i}") for i in range(5)]
+    return ProfileListDTO(
+        total=items,
+        next_cursor="WzEwXQ==",
+        profiles=[
+            ProfileDTO(
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                birthdate=date(1990, 1, 1),
+                about_me="python backend distributed systems",
+                work_experience=i % 120,
+                user=user(i),
+                skills=skills,
+            )
+            for i in range(items)
+        ],
+    )
+
+
+def members(items: int) -> MemberListDTO:
+    return MemberListDTO(members=[member(i) for i in range(items)])
+
+
+def tasks(items: int) -> TaskBoardDTO:
+    return TaskBoardDTO(
+        counts={task_status: items for task_status in TaskStatus},
+        tasks=[
+            TaskDTO(
+                id=i,
+                member=member(i % 20),
+                description=f"task {i}",
+                status=TaskStatus.IN_PROGRESS,
+                created_at=NOW,
+                updated_at=NOW,
+                deadline=date(2026, 2, 1),
+            )
+            for i in range(items)
+        ],
+    )
+
+
+def projects(items: int) -> ProjectListDTO:
+    teams = [TeamDTO(id=i, name=f"Team {i}", created_at=NOW) for i in range(3)]
+    return ProjectListDTO(
+        projects=[
+            ProjectTeamsDTO(
+                id=i,
+                name=f"Project {i}",
+                description="synthetic",
+                deadline=date(2026, 6, 1),
+                teams=teams,
+            )
+            for i in range(items)
+        ],
+    )
+
+
+PAYLOADS = {
+    ("GET", "/profiles/"): profiles,
+    ("GET", "/teams/{team_id}/members"): members,
+    ("GET", "/teams/{team_id}/tasks"): tasks,
+    ("GET", "/projects/"): projects,
+}
+
+
+def find_route(method: str, path: str) -> APIRoute:
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        if route.path == path and method in route.methods:
+            return route
+
+    raise LookupError(f"{method} {path}")
+
+
+async def default_path(route: APIRoute, content: CoreDTO) -> bytes:
+    encoded = await serialize_response(
+        field=route.response_field,
+        response_content=content,
+        is_coroutine=True,
+    )
+
+    return JSONResponse(encoded).body
+
+
+async def fast_path(route: APIRoute, content: CoreDTO) -> bytes:
+    return to_json(content, by_alias=True)
+
+
+async def measure(
+    serialize: Callable[[APIRoute, CoreDTO], Awaitable[bytes]],
+    route: APIRoute,
+    content: CoreDTO,
+    seconds: float,
+) -> float:
+    # mean seconds per response over at least `seconds` of runs
+    runs, started_at = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - started_at) < seconds:
+        for _ in range(10):
+            await serialize(route, content)
+        runs += 10
+
+    return elapsed / runs
+
+
+async def main(args: argparse.Namespace) -> dict:
+    print(
+        f"{'endpoint':<34}{'items':>8}{'default us':>14}{'fast us':>12}"
+        f"{'speedup':>10}"
+    )
+
+    results = []
+    for (method, path), build in PAYLOADS.items():
+        route = find_route(method, path)
+        for items in args.items:
+            content = build(items)
+            # both paths have to produce the same document
+            default = json.loads(await default_path(route, content))
+            assert default == json.loads(await fast_path(route, content)), path
+
+            default_time = await measure(default_path, route, content, args.seconds)
+            fast_time = await measure(fast_path, route, content, args.seconds)
+            results.append(
+                {
+                    "endpoint": f"{method} {path}",
+                    "items": items,
+                    "default_us": round(default_time * 1e6, 1),
+                    "fast_us": round(fast_time * 1e6, 1),
+                    "speedup": round(default_time / fast_time, 2),
+                }
+            )
+
+            result = results[-1]
+            print(
+                f"{result['endpoint']:<34}{items:>8}{result['default_us']:>14}"
+                f"{result['fast_us']:>12}{result['speedup']:>9}x"
+            )
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lab1 response serialization")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=0.5, help="per measurement")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    output = args.output or Path(
+        "benchmarks/results",
+        f"serialization-{time.strftime('%Y%m%d-%H%M%S')}.json",
+    )
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nsaved to {output}")
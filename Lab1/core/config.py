@@ -1,5 +1,11 @@
-from typing import Annotated
-from pydantic import Field, PositiveInt, PostgresDsn
+from typing import Annotated, Optional
+from pydantic import (
+    Field,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    PostgresDsn,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,8 +13,65 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="APP_", extra="ignore")
 
     DATABASE_URI: PostgresDsn
+    DATABASE_REPLICA_URI: Optional[PostgresDsn] = None
+    # seconds a client stays on the primary after a write, to read its own writes
+    DATABASE_READ_YOUR_WRITES_WINDOW: Annotated[PositiveInt, Field(default=5)]
+    DATABASE_ECHO: Annotated[bool, Field(default=False)]
+    DATABASE_POOL_SIZE: Annotated[PositiveInt, Field(default=10)]
+    DATABASE_MAX_OVERFLOW: Annotated[NonNegativeInt, Field(default=10)]
+    DATABASE_POOL_TIMEOUT: Annotated[PositiveFloat, Field(default=10)]
+    DATABASE_POOL_RECYCLE: Annotated[int, Field(default=60 * 30)]  # -1 disables
+    # a round trip on every checkout, pool_recycle already retires old connections
+    DATABASE_POOL_PRE_PING: Annotated[bool, Field(default=False)]
+    DATABASE_STATEMENT_CACHE_SIZE: Annotated[NonNegativeInt, Field(default=100)]
+    # disables prepared statement caching, required behind pgbouncer transaction pooling
+    DATABASE_PGBOUNCER: Annotated[bool, Field(default=False)]
+    # requests issuing more statements than this are logged as possible N+1
+    SQL_STATEMENT_BUDGET: Annotated[PositiveInt, Field(default=20)]
+    SQL_STATS_HEADERS: Annotated[bool, Field(default=True)]
+    # write returned DTOs straight to JSON, response_model only documents them
+    FAST_JSON_RESPONSES: Annotated[bool, Field(default=True)]
+
     JWT_TTL: Annotated[PositiveInt, Field(default=60 * 60 * 3)]
     JWT_SECRET: str
+    # trust the user claims of the token instead of loading the user row
+    JWT_STATELESS: Annotated[bool, Field(default=False)]
+    JWT_REVOCATION_SYNC_INTERVAL: Annotated[PositiveInt, Field(default=30)]
+
+    PASSWORD_SCRYPT_N: Annotated[PositiveInt, Field(default=2**14)]
+    PASSWORD_SCRYPT_R: Annotated[PositiveInt, Field(default=8)]
+    PASSWORD_SCRYPT_P: Annotated[PositiveInt, Field(default=1)]
+    PASSWORD_HASH_WORKERS: Annotated[PositiveInt, Field(default=4)]
+    PASSWORD_HASH_CONCURRENCY: Annotated[PositiveInt, Field(default=32)]
+
+    SEARCH_MAX_PAGE_SIZE: Annotated[PositiveInt, Field(default=100)]
+    PROJECT_MAX_PAGE_SIZE: Annotated[PositiveInt, Field(default=100)]
+    TASK_MAX_PAGE_SIZE: Annotated[PositiveInt, Field(default=100)]
+
+    # capped counts stop counting matches after this many rows
+    SEARCH_COUNT_CAP: Annotated[PositiveInt, Field(default=1000)]
+
+    # rows fetched per round trip of an export cursor
+    EXPORT_BATCH_SIZE: Annotated[PositiveInt, Field(default=1000)]
+    # bytes of serialized rows buffered before a chunk is sent
+    EXPORT_CHUNK_SIZE: Annotated[PositiveInt, Field(default=64 * 1024)]
+
+    # largest number of tasks accepted by one bulk create request
+    TASK_BULK_MAX_SIZE: Annotated[PositiveInt, Field(default=1000)]
+    # largest number of members accepted by one bulk add request
+    MEMBER_BULK_MAX_SIZE: Annotated[PositiveInt, Field(default=1000)]
+    # largest skill set accepted by one profile skills replace request
+    PROFILE_SKILLS_MAX: Annotated[PositiveInt, Field(default=100)]
+
+    SKILL_CATALOG_TTL: Annotated[PositiveInt, Field(default=60 * 5)]
+    SKILL_CATALOG_MAX_AGE: Annotated[NonNegativeInt, Field(default=60)]
+
+    TOKEN_CACHE_SIZE: Annotated[PositiveInt, Field(default=10_000)]
+    TOKEN_CACHE_TTL: Annotated[PositiveInt, Field(default=60 * 5)]
+
+    # bounds how long other workers may serve a stale team role
+    TEAM_ROLE_CACHE_SIZE: Annotated[PositiveInt, Field(default=10_000)]
+    TEAM_ROLE_CACHE_TTL: Annotated[PositiveInt, Field(default=30)]
 
 
 settings = Settings()
@@ -1,13 +1,133 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional
+from uuid import uuid4
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
+    AsyncEngine,
     AsyncSession,
 )
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from core.dtos import PoolStatusDTO
+from core.metrics import Histogram
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    rows: int = 0
+    duration: float = 0.0
+
+
+# set per request by QueryStatsMiddleware, None outside of requests
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    # the request owns the transaction, side effects that must not be seen
+    # before the data (cache invalidation) run once it has committed
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+def run_on_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.wait_time_histogram = Histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent waiting for a connection from the pool",
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+        )
+
+    def record_wait(self, wait_time: float) -> None:
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.wait_time_histogram.observe(wait_time)
+
+
+class TimedQueue(AsyncAdaptedQueue):
+    stats: PoolStats
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        # only the wait for a returned connection, opening a new one is not timed
+        started_at = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            self.stats.record_wait(time.perf_counter() - started_at)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    _queue_class = TimedQueue
+
+    @property
+    def stats(self) -> PoolStats:
+        return self._pool.stats
+
+    @stats.setter
+    def stats(self, stats: PoolStats) -> None:
+        self._pool.stats = stats
+
+    def _do_get(self):
+        self.stats.checkouts += 1
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
 
 
 class SQLConnection:
-    def __init__(self, database_uri: str):
-        self._engine = create_async_engine(url=database_uri, echo=True)
+    def __init__(
+        self,
+        database_uri: str,
+        replica_uri: Optional[str] = None,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        pgbouncer: bool = False,
+    ):
+        engine_options = {
+            "echo": echo,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+            "statement_cache_size": statement_cache_size,
+            "pgbouncer": pgbouncer,
+        }
+
+        self._pool_stats = PoolStats()
+        self._engine = self._create_engine(
+            database_uri,
+            self._pool_stats,
+            **engine_options,
+        )
 
         self._session_factory = async_sessionmaker(
             bind=self._engine,
@@ -15,9 +135,104 @@ class SQLConnection:
             autocommit=False,
         )
 
+        # without a replica read sessions go to the primary
+        self._replica_engine: Optional[AsyncEngine] = None
+        self._read_session_factory = self._session_factory
+        if replica_uri is not None:
+            self._replica_engine = self._create_engine(
+                replica_uri,
+                PoolStats(),
+                **engine_options,
+            )
+
+            self._read_session_factory = async_sessionmaker(
+                bind=self._replica_engine,
+                expire_on_commit=False,
+                autocommit=False,
+            )
+
     def get_sesion(self) -> AsyncSession:
         session = self._session_factory()
         return session
 
+    def get_read_session(self) -> AsyncSession:
+        session = self._read_session_factory()
+        return session
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        return self._pool_stats
+
+    def pool_status(self) -> PoolStatusDTO:
+        pool = self._engine.pool
+        return PoolStatusDTO(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # the pool counts from -pool_size, only connections above it are reported
+            overflow=max(pool.overflow(), 0),
+            checkouts=self._pool_stats.checkouts,
+            timeouts=self._pool_stats.timeouts,
+            wait_time_total=self._pool_stats.wait_time_total,
+            wait_time_max=self._pool_stats.wait_time_max,
+        )
+
     async def close(self) -> None:
         await self._engine.dispose()
+        if self._replica_engine is not None:
+            await self._replica_engine.dispose()
+
+    def _create_engine(
+        self,
+        database_uri: str,
+        pool_stats: PoolStats,
+        statement_cache_size: int,
+        pgbouncer: bool,
+        **engine_options,
+    ) -> AsyncEngine:
+        # pgbouncer in transaction mode can route every transaction to another
+        # server connection, so named prepared statements must not be reused
+        if pgbouncer:
+            statement_cache_size = 0
+
+        # asyncpg and the sqlalchemy adapter above it each keep their own cache
+        url = make_url(database_uri).update_query_dict(
+            {"prepared_statement_cache_size": str(statement_cache_size)}
+        )
+        connect_args = {"statement_cache_size": statement_cache_size}
+        if pgbouncer:
+            connect_args["prepared_statement_name_func"] = (
+                lambda: f"__asyncpg_{uuid4()}__"
+            )
+
+        engine = create_async_engine(
+            url=url,
+            poolclass=TimedQueuePool,
+            connect_args=connect_args,
+            **engine_options,
+        )
+
+        engine.pool.stats = pool_stats
+        self._track_queries(engine.sync_engine)
+        return engine
+
+    @staticmethod
+    def _track_queries(engine: Engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # kept on the execution, a failed statement leaves nothing behind
+            context._query_started_at = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started_at = context._query_started_at
+            stats = query_stats.get()
+            if stats is None:
+                return
+
+            stats.statements += 1
+            stats.duration += time.perf_counter() - started_at
+            # the rowcount comes from the command status ("SELECT 3", "UPDATE 1").
+            # server side cursors (session.stream) report -1, their rows are fetched
+            # after the response headers are sent and are not counted
+            stats.rows += max(cursor.rowcount, 0)
@@ -1,16 +1,81 @@
-from core.database import SQLConnection
+import time
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import SQLConnection, run_on_commit
 from core.config import settings
 
-connection = SQLConnection(database_uri=str(settings.DATABASE_URI))
+connection = SQLConnection(
+    database_uri=str(settings.DATABASE_URI),
+    replica_uri=(
+        str(settings.DATABASE_REPLICA_URI)
+        if settings.DATABASE_REPLICA_URI is not None
+        else None
+    ),
+    echo=settings.DATABASE_ECHO,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
+    pgbouncer=settings.DATABASE_PGBOUNCER,
+)
+
+# set on writes with the time of the write, the client carries its own pin
+# to whichever worker serves its next read
+LAST_WRITE_COOKIE = "last-write"
 
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
 
-async def get_session():
+
+async def get_session(request: Request, response: Response):
+    # the single transaction of the request, services only flush
     session = connection.get_sesion()
+    if request.method not in SAFE_METHODS:
+        # the response is built before the commit below, a failed commit is an
+        # error response which does not carry the cookie
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=settings.DATABASE_READ_YOUR_WRITES_WINDOW,
+            httponly=True,
+            samesite="lax",
+        )
+
     try:
         yield session
         await session.commit()
+        run_on_commit(session)
     except Exception as exc:
         await session.rollback()
         raise exc
     finally:
         await session.close()
+
+
+def open_read_session(request: Request) -> AsyncSession:
+    # replicas lag behind, a client that has just written keeps reading the primary
+    if has_written_recently(request):
+        return connection.get_sesion()
+
+    return connection.get_read_session()
+
+
+def has_written_recently(request: Request) -> bool:
+    try:
+        written_at = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+
+    # the cookie max-age is not trusted alone
+    return time.time() - written_at < settings.DATABASE_READ_YOUR_WRITES_WINDOW
+
+
+async def get_read_session(request: Request):
+    session = open_read_session(request)
+    try:
+        yield session
+    finally:
+        await session.close()
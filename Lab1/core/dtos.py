@@ -7,3 +7,14 @@ class CoreDTO(BaseModel):
         frozen=True,
         from_attributes=True,
     )
+
+
+class PoolStatusDTO(CoreDTO):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_max: float
@@ -0,0 +1,77 @@
+import csv
+import io
+from enum import StrEnum
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from core.config import settings
+from core.dtos import CoreDTO
+
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def export_response(
+    rows: AsyncIterator[CoreDTO],
+    model: type[CoreDTO],
+    export_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    # rows are serialized one by one as they come from the cursor, memory only
+    # holds the current chunk whatever the size of the export
+    if export_format == ExportFormat.CSV:
+        body = _csv_chunks(rows, list(model.model_fields))
+    else:
+        body = _ndjson_chunks(rows)
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
+
+
+async def _ndjson_chunks(rows: AsyncIterator[CoreDTO]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    async for row in rows:
+        buffer.write(row.model_dump_json())
+        buffer.write("\n")
+        if buffer.tell() >= settings.EXPORT_CHUNK_SIZE:
+            yield _drain(buffer)
+
+    yield _drain(buffer)
+
+
+async def _csv_chunks(
+    rows: AsyncIterator[CoreDTO], fields: list[str]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    # the header goes out at once, before the first rows are read
+    yield _drain(buffer)
+
+    async for row in rows:
+        writer.writerow(row.model_dump(mode="json").values())
+        if buffer.tell() >= settings.EXPORT_CHUNK_SIZE:
+            yield _drain(buffer)
+
+    yield _drain(buffer)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
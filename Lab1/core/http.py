@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import Request, Response, status
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    if etag is None:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str, headers: Optional[dict[str, str]] = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={**(headers or {}), "ETag": etag},
+    )
@@ -0,0 +1,158 @@
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Iterable, Sequence
+
+# Metrics are only updated from the event loop thread, so plain dict and
+# int updates are atomic here and no locks are taken on the request path.
+
+type Labels = tuple[str, ...]
+type Sample = tuple[str, Labels, float]
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def render_metric(
+    name: str,
+    kind: str,
+    documentation: str,
+    labelnames: Sequence[str],
+    samples: Iterable[Sample],
+) -> str:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        pairs = ",".join(
+            f'{labelname}="{_escape(str(label))}"'
+            for labelname, label in zip(labelnames, labels)
+        )
+
+        pairs = f"{{{pairs}}}" if pairs else ""
+        lines.append(f"{name}{suffix}{pairs} {_format_value(value)}")
+
+    return "\n".join(lines)
+
+
+class Metric:
+    kind: str
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return render_metric(
+            self.name,
+            self.kind,
+            self.documentation,
+            self.labelnames,
+            self.samples(),
+        )
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: defaultdict[Labels, float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] += amount
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._values.items():
+            yield "", labels, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] -= amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = (*sorted(buckets), math.inf)
+        # labels => [per bucket counts..., sum]
+        self._values: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0] * len(self._buckets) + [0.0]
+
+        values[bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, values in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self._buckets, values):
+                cumulative += count
+                yield "_bucket", (*labels, _format_value(bound)), cumulative
+
+            yield "_sum", labels, values[-1]
+            yield "_count", labels, cumulative
+
+    def render(self) -> str:
+        return render_metric(
+            self.name,
+            self.kind,
+            self.documentation,
+            (*self.labelnames, "le"),
+            self.samples(),
+        )
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        # collectors render metrics whose values are only read at scrape time
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        chunks = [metric.render() for metric in self._metrics]
+        for collector in self._collectors:
+            chunks.extend(collector())
+
+        return "\n".join(chunks) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,113 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.database import QueryStats, query_stats
+from core.metrics import Counter, Gauge, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+requests_in_flight = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "Requests currently being processed",
+        ["method"],
+    )
+)
+
+request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Request latency by route template",
+        ["method", "route"],
+    )
+)
+
+request_errors = registry.register(
+    Counter(
+        "http_request_errors_total",
+        "Responses with an error status code",
+        ["method", "route", "status"],
+    )
+)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, statement_budget: int, headers: bool = True):
+        self.app = app
+        self.statement_budget = statement_budget
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if self.headers and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Statements"] = str(stats.statements)
+                headers["X-DB-Rows"] = str(stats.rows)
+                headers["X-DB-Time"] = f"{stats.duration * 1000:.3f}"
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats.reset(token)
+            if stats.statements > self.statement_budget:
+                route = scope.get("route")
+                extra = {
+                    "method": scope["method"],
+                    "route": route.path if route else scope["path"],
+                    "statements": stats.statements,
+                    "rows": stats.rows,
+                    "db_time_ms": round(stats.duration * 1000, 3),
+                    "budget": self.statement_budget,
+                }
+
+                logger.warning(
+                    "SQL statement budget exceeded: %(method)s %(route)s issued "
+                    "%(statements)s statements, budget is %(budget)s",
+                    extra,
+                    extra=extra,
+                )
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        requests_in_flight.inc(method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec(method)
+            # label by template, raw paths would create a series per entity id
+            route = scope.get("route")
+            route = route.path if route else "unmatched"
+            request_duration.observe(time.perf_counter() - started_at, method, route)
+            if status_code >= 400:
+                request_errors.inc(method, route, str(status_code))
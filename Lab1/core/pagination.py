@@ -0,0 +1,44 @@
+import base64
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+
+
+# cursors carry the sort key values of the last row of a page
+def encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(
+    cursor: Optional[str], types: tuple[type, ...]
+) -> Optional[list[Any]]:
+    # the values become bind parameters, a tampered cursor must be a 400
+    # rather than a database error
+    if cursor is None:
+        return None
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(map(_is_of_type, values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return values
+
+
+def _is_of_type(value: Any, expected: type) -> bool:
+    # json has a single number type, an integral float is written as an int
+    if expected is float:
+        return type(value) in (int, float)
+
+    return type(value) is expected
@@ -0,0 +1,64 @@
+from typing import Iterable
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.cache import caches
+from core.depends import connection
+from core.dtos import PoolStatusDTO
+from core.metrics import registry, render_metric
+from core.routing import FastJSONRoute
+
+router = APIRouter(route_class=FastJSONRoute)
+
+
+def collect_pool_metrics() -> Iterable[str]:
+    status = connection.pool_status()
+    for name, documentation, value in (
+        ("db_pool_size", "Configured pool size", status.size),
+        ("db_pool_checked_out", "Connections in use", status.checked_out),
+        # pool_status clamps overflow, the pool itself counts from -pool_size
+        (
+            "db_pool_overflow",
+            "Connections opened above the pool size, 0 within it",
+            status.overflow,
+        ),
+    ):
+        yield render_metric(name, "gauge", documentation, (), [("", (), value)])
+
+    yield render_metric(
+        "db_pool_timeouts_total",
+        "counter",
+        "Checkouts that timed out waiting for a connection",
+        (),
+        [("", (), status.timeouts)],
+    )
+
+    yield connection.pool_stats.wait_time_histogram.render()
+
+
+def collect_cache_metrics() -> Iterable[str]:
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for name, kind, documentation, key in (
+        ("cache_hits_total", "counter", "Lookups served from the cache", "hits"),
+        ("cache_misses_total", "counter", "Lookups missing the cache", "misses"),
+        ("cache_size", "gauge", "Entries held in the cache", "size"),
+    ):
+        samples = [("", (cache,), values[key]) for cache, values in stats.items()]
+        yield render_metric(name, kind, documentation, ("cache",), samples)
+
+
+registry.add_collector(collect_pool_metrics)
+registry.add_collector(collect_cache_metrics)
+
+
+@router.get("/health/pool", response_model=PoolStatusDTO)
+async def get_pool_status():
+    return connection.pool_status()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
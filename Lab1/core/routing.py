@@ -0,0 +1,64 @@
+import asyncio
+import dataclasses
+import functools
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic_core import to_json
+
+from core.config import settings
+from core.dtos import CoreDTO
+
+# the response FastAPI hands to the endpoint for its headers and status code,
+# requested under this name when the endpoint does not declare it itself
+_SUB_RESPONSE = "_fast_json_sub_response"
+
+
+class FastJSONRoute(APIRoute):
+    # Services return CoreDTOs they have already validated. FastAPI would
+    # validate them again against response_model and encode the result; here
+    # a DTO of the response model is written straight to JSON bytes instead.
+    # response_model is still what the OpenAPI schema is built from.
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        if settings.FAST_JSON_RESPONSES and asyncio.iscoroutinefunction(
+            self.dependant.call
+        ):
+            self.dependant = dataclasses.replace(
+                self.dependant,
+                call=self._fast_json(self.dependant.call),
+                response_param_name=self.dependant.response_param_name
+                or _SUB_RESPONSE,
+            )
+
+        return super().get_route_handler()
+
+    def _fast_json(self, call: Callable[..., Any]) -> Callable[..., Any]:
+        declared = self.dependant.response_param_name
+
+        @functools.wraps(call)
+        async def endpoint(**values: Any) -> Any:
+            sub_response = values[declared or _SUB_RESPONSE]
+            if declared is None:
+                del values[_SUB_RESPONSE]
+
+            content = await call(**values)
+            # anything else, an ORM object or a DTO narrowed by response_model,
+            # goes through the usual validation
+            if not isinstance(content, CoreDTO) or (
+                self.response_model is not None
+                and type(content) is not self.response_model
+            ):
+                return content
+
+            response = Response(
+                to_json(content, by_alias=True),
+                status_code=sub_response.status_code or self.status_code or 200,
+                media_type="application/json",
+            )
+
+            # headers set on the injected response, the ETags among them
+            response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        return endpoint
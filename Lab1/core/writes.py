@@ -0,0 +1,38 @@
+from typing import Any, Optional
+
+from sqlalchemy import Row, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+# Writes that hand back the stored row in the same round trip, column defaults
+# and server generated values included, so nothing has to be refreshed after
+# the commit. The rows are not attached to the session.
+
+
+async def insert_returning(
+    session: AsyncSession, model: type[SQLModel], values: dict[str, Any]
+) -> Row:
+    stmt = insert(model).values(values).returning(*model.__table__.columns)
+    return (await session.execute(stmt)).one()
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: type[SQLModel],
+    values: dict[str, Any],
+    *where: Any,
+) -> Optional[Row]:
+    # None when no row matched
+    if not values:
+        # an empty SET list is a syntax error, nothing to write: read the row
+        stmt = select(*model.__table__.columns).where(*where)
+        return (await session.execute(stmt)).one_or_none()
+
+    stmt = (
+        update(model)
+        .where(*where)
+        .values(values)
+        .returning(*model.__table__.columns)
+    )
+
+    return (await session.execute(stmt)).one_or_none()
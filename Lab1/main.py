@@ -1,17 +1,41 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from core.config import settings
+from core.depends import connection
+from core.middlewares import MetricsMiddleware, QueryStatsMiddleware
+from core.routes import router as core_router
 from users.routes import router as user_router
 from profiles.routes import router as profile_router
 from projects.routes import router as project_router
 from teams.routes import router as team_router
+from users.depends import password_hasher, sync_token_versions
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # cached tokens outlive revocations made by other workers in both modes
+    sync_task = asyncio.create_task(
+        sync_token_versions(settings.JWT_REVOCATION_SYNC_INTERVAL)
+    )
+
     yield
 
+    sync_task.cancel()
+
+    password_hasher.close()
+    await connection.close()
+
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    QueryStatsMiddleware,
+    statement_budget=settings.SQL_STATEMENT_BUDGET,
+    headers=settings.SQL_STATS_HEADERS,
+)
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(core_router)
 app.include_router(user_router)
 app.include_router(profile_router)
 app.include_router(project_router)
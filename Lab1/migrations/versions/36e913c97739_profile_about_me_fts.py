@@ -0,0 +1,34 @@
+"""profile about_me full text index
+
+Revision ID: 36e913c97739
+Revises: 26552dd04f9a
+Create Date: 2026-10-18 10:12:48.331906
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '36e913c97739'
+down_revision: Union[str, None] = '26552dd04f9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_profile_about_me_fts',
+        'profile',
+        [sa.text("to_tsvector('simple'::regconfig, about_me)")],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_profile_about_me_fts', table_name='profile')
@@ -0,0 +1,34 @@
+"""profile skill search index
+
+Revision ID: 6020fd398fb4
+Revises: 9efac390bd91
+Create Date: 2026-10-18 11:02:37.540129
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6020fd398fb4'
+down_revision: Union[str, None] = '9efac390bd91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_profileskill_skill_id_level_profile_id',
+        'profileskill',
+        ['skill_id', 'level', 'profile_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_profileskill_skill_id_level_profile_id', table_name='profileskill')
@@ -0,0 +1,64 @@
+"""hot query indexes
+
+Revision ID: fc3be6871392
+Revises: 6020fd398fb4
+Create Date: 2026-10-18 11:24:51.906214
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fc3be6871392'
+down_revision: Union[str, None] = '6020fd398fb4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # keep the oldest membership of every (team, user) pair, its duplicates'
+    # tasks are moved to it before the duplicates are removed
+    op.execute("""
+        WITH duplicate AS (
+            SELECT id, min(id) OVER (PARTITION BY team_id, user_id) AS keep_id
+            FROM member
+        )
+        UPDATE task SET member_id = duplicate.keep_id
+        FROM duplicate
+        WHERE task.member_id = duplicate.id AND duplicate.id <> duplicate.keep_id
+    """)
+    op.execute("""
+        DELETE FROM member
+        USING member AS kept
+        WHERE member.team_id = kept.team_id
+            AND member.user_id = kept.user_id
+            AND member.id > kept.id
+    """)
+
+    op.create_unique_constraint('uq_member_team_id_user_id', 'member', ['team_id', 'user_id'])
+    op.create_index(op.f('ix_member_user_id'), 'member', ['user_id'], unique=False)
+    op.create_index('ix_task_member_id_status', 'task', ['member_id', 'status'], unique=False)
+    op.create_index(
+        'ix_task_open_member_id_deadline',
+        'task',
+        ['member_id', 'deadline'],
+        unique=False,
+        postgresql_where=sa.text("status <> 'DONE'"),
+    )
+    op.create_index(op.f('ix_workflow_project_id'), 'workflow', ['project_id'], unique=False)
+    op.create_index(op.f('ix_profile_work_experience'), 'profile', ['work_experience'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_profile_work_experience'), table_name='profile')
+    op.drop_index(op.f('ix_workflow_project_id'), table_name='workflow')
+    op.drop_index('ix_task_open_member_id_deadline', table_name='task')
+    op.drop_index('ix_task_member_id_status', table_name='task')
+    op.drop_index(op.f('ix_member_user_id'), table_name='member')
+    op.drop_constraint('uq_member_team_id_user_id', 'member', type_='unique')
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import time
+from typing import Callable, Optional
+
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from profiles.dtos import SkillDTO
+from profiles.models import Skill
+
+# a lookup of an unknown id reloads the catalog at most this often
+MISS_RELOAD_INTERVAL = 5
+
+
+class SkillCatalog:
+    def __init__(self, session_factory: Callable[[], AsyncSession], ttl: float):
+        self._session_factory = session_factory
+        self._ttl = ttl
+        self._lock = asyncio.Lock()
+
+        self._skills: dict[int, SkillDTO] = {}
+        self._names: dict[str, SkillDTO] = {}
+        self._body = b""
+        self._etag = ""
+        self._loaded_at = 0.0
+        self._expires_at = 0.0
+
+    @property
+    def etag(self) -> Optional[str]:
+        # None when the catalog has to be (re)loaded
+        return self._etag if time.monotonic() < self._expires_at else None
+
+    async def get_skills(self) -> list[SkillDTO]:
+        await self._ensure_loaded()
+        return list(self._skills.values())
+
+    async def get_body(self) -> tuple[bytes, str]:
+        await self._ensure_loaded()
+        return self._body, self._etag
+
+    async def get_skill(self, skill_id: int) -> Optional[SkillDTO]:
+        await self._ensure_loaded()
+        if skill_id not in self._skills:
+            await self._reload_on_miss()
+
+        return self._skills.get(skill_id)
+
+    async def get_skills_by_name(self, names: list[str]) -> list[SkillDTO]:
+        # unknown names are skipped
+        await self._ensure_loaded()
+        if any(name not in self._names for name in names):
+            await self._reload_on_miss()
+
+        names = dict.fromkeys(names)
+        return [self._names[name] for name in names if name in self._names]
+
+    async def _reload_on_miss(self) -> None:
+        # the skill may have been added after the catalog was loaded
+        if time.monotonic() - self._loaded_at <= MISS_RELOAD_INTERVAL:
+            return
+
+        async with self._lock:
+            # misses arriving together reload once
+            if time.monotonic() - self._loaded_at > MISS_RELOAD_INTERVAL:
+                await self._load()
+
+    async def _ensure_loaded(self) -> None:
+        if time.monotonic() < self._expires_at:
+            return
+
+        async with self._lock:
+            if time.monotonic() >= self._expires_at:
+                await self._load()
+
+    async def _load(self) -> None:
+        async with self._session_factory() as session:
+            stmt = select(Skill).order_by(Skill.id)
+            skills = (await session.execute(stmt)).scalars().all()
+
+        self._skills = {skill.id: SkillDTO.model_validate(skill) for skill in skills}
+        self._names = {skill.name: skill for skill in self._skills.values()}
+        body = to_json({"skills": list(self._skills.values())})
+        # derived from the content, so every worker serves the same etag
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        if etag != self._etag:
+            self._body, self._etag = body, etag
+
+        self._loaded_at = time.monotonic()
+        self._expires_at = self._loaded_at + self._ttl
@@ -1,12 +1,29 @@
 from typing import Annotated
 
 from fastapi import Depends
-from core.depends import get_session
+from core.config import settings
+from core.depends import connection, get_read_session, get_session
+from profiles.catalog import SkillCatalog
 from profiles.services import ProfileService
 from sqlalchemy.ext.asyncio import AsyncSession
 
+skill_catalog = SkillCatalog(
+    session_factory=connection.get_read_session,
+    ttl=settings.SKILL_CATALOG_TTL,
+)
+
+
+def get_skill_catalog() -> SkillCatalog:
+    return skill_catalog
+
 
 def get_profile_service(
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> ProfileService:
-    return ProfileService(session)
+    return ProfileService(session, skill_catalog)
+
+
+def get_read_profile_service(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> ProfileService:
+    return ProfileService(session, skill_catalog)
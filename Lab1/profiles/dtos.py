@@ -1,9 +1,12 @@
 from datetime import date
+from enum import StrEnum
 from typing import Annotated, Optional
 
 from pydantic import PositiveInt
 from sqlmodel import Field
+from core.config import settings
 from core.dtos import CoreDTO
+from profiles.models import SkillLevel
 from users.dtos import UserDTO
 
 
@@ -12,6 +15,31 @@ class SkillDTO(CoreDTO):
     name: str
 
 
+class SkillListDTO(CoreDTO):
+    skills: list[SkillDTO]
+
+
+class ProfileSkillDTO(SkillDTO):
+    level: SkillLevel
+
+
+class ProfileSkillSetDTO(CoreDTO):
+    skill_id: int
+    level: SkillLevel = SkillLevel.BEGINNER
+
+
+class ProfileSkillsSetDTO(CoreDTO):
+    # an empty set removes every skill
+    skills: Annotated[
+        list[ProfileSkillSetDTO],
+        Field(max_length=settings.PROFILE_SKILLS_MAX),
+    ]
+
+
+class ProfileSkillListDTO(CoreDTO):
+    skills: list[ProfileSkillDTO]
+
+
 class ProfileBaseDTO(CoreDTO):
     first_name: str
     last_name: str
@@ -38,12 +66,37 @@ class ProfileDTO(ProfileBaseDTO):
     skills: Annotated[list[SkillDTO], Field(default_factory=list)]
 
 
+class ProfileExportDTO(CoreDTO):
+    user_id: int
+    email: str
+    first_name: str
+    last_name: str
+    birthdate: date
+    about_me: str
+    work_experience: int
+
+
+class CountMode(StrEnum):
+    EXACT = "exact"
+    CAPPED = "capped"
+    NONE = "none"
+
+
+class SkillMatch(StrEnum):
+    ANY = "any"
+    ALL = "all"
+
+
 class ProfileListDTO(CoreDTO):
-    total: int
+    total: Optional[int]
+    total_is_exact: bool = True
+    next_cursor: Optional[str] = None
     profiles: list[ProfileDTO]
 
 
 class CriteriaDTO(CoreDTO):
     skills: list[str]
+    skills_match: SkillMatch = SkillMatch.ANY
+    min_level: Optional[SkillLevel] = None
     work_experience: int
     interests: list[str]
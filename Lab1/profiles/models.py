@@ -1,6 +1,8 @@
+import re
 from datetime import date
 from enum import StrEnum
 from typing import Optional
+from sqlalchemy import Index, func, literal_column, text
 from sqlmodel import SQLModel, Field, Relationship
 
 from core.models import CoreModel
@@ -14,6 +16,16 @@ class SkillLevel(StrEnum):
 
 
 class ProfileSkill(SQLModel, table=True):
+    # covers skill search: skill and level filters, grouped by profile
+    __table_args__ = (
+        Index(
+            "ix_profileskill_skill_id_level_profile_id",
+            "skill_id",
+            "level",
+            "profile_id",
+        ),
+    )
+
     profile_id: int = Field(
         foreign_key="profile.id",
         primary_key=True,
@@ -39,12 +51,23 @@ class Skill(CoreModel, table=True):
 
 
 class Profile(CoreModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_profile_about_me_fts",
+            text("to_tsvector('simple'::regconfig, about_me)"),
+            postgresql_using="gin",
+        ),
+    )
+
     first_name: str
     last_name: str
     birthdate: date
 
     about_me: str
-    work_experience: int
+    work_experience: int = Field(index=True)
+
+    # bumped on every change of the profile or its skills
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     user_id: int = Field(
         foreign_key="user.id",
@@ -61,3 +84,23 @@ class Profile(CoreModel, table=True):
         link_model=ProfileSkill,
         sa_relationship_kwargs={"lazy": "selectin", "uselist": True},
     )
+
+
+# must match the expression of the ix_profile_about_me_fts index, the config
+# is inlined because postgres can not use the index for a bound parameter
+ABOUT_ME_SEARCH_CONFIG = literal_column("'simple'")
+
+
+def about_me_document():
+    return func.to_tsvector(ABOUT_ME_SEARCH_CONFIG, Profile.about_me)
+
+
+def interests_query(interests: list[str]):
+    # any interest matches, every word of it as a prefix: "pyth" finds "python"
+    terms = []
+    for interest in interests:
+        words = re.findall(r"\w+", interest.lower())
+        if words:
+            terms.append("(" + " & ".join(f"{word}:*" for word in words) + ")")
+
+    return func.to_tsquery(ABOUT_ME_SEARCH_CONFIG, " | ".join(terms))
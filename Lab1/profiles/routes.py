@@ -1,36 +1,109 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Query
-
-from profiles.depends import get_profile_service
-from profiles.dtos import CriteriaDTO, ProfileCreateDTO, ProfileDTO, ProfileUpdateDTO
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+
+from core.config import settings
+from core.depends import open_read_session
+from core.export import ExportFormat, export_response
+from core.http import is_not_modified, not_modified
+from core.routing import FastJSONRoute
+from profiles.catalog import SkillCatalog
+from profiles.depends import (
+    get_profile_service,
+    get_read_profile_service,
+    get_skill_catalog,
+    skill_catalog,
+)
+from profiles.dtos import (
+    CountMode,
+    CriteriaDTO,
+    ProfileCreateDTO,
+    ProfileDTO,
+    ProfileExportDTO,
+    ProfileListDTO,
+    ProfileSkillListDTO,
+    ProfileSkillsSetDTO,
+    ProfileUpdateDTO,
+    SkillListDTO,
+    SkillMatch,
+)
+from profiles.models import SkillLevel
 from profiles.services import ProfileService
 from users.depends import get_current_user
 from users.models import User
 
-router = APIRouter(prefix="/profiles")
+router = APIRouter(prefix="/profiles", route_class=FastJSONRoute)
 
 
-@router.get("/")
+@router.get("/", response_model=ProfileListDTO)
 async def search_profiles(
-    service: Annotated[ProfileService, Depends(get_profile_service)],
+    service: Annotated[ProfileService, Depends(get_read_profile_service)],
+    skills: list[str] = Query(default=[]),
+    skills_match: SkillMatch = Query(default=SkillMatch.ANY),
+    min_level: Optional[SkillLevel] = Query(default=None),
+    work_experience: int = Query(default=0, ge=0),
+    interests: list[str] = Query(default=[]),
+    limit: int = Query(default=20, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default=CountMode.CAPPED),
+):
+    dto = CriteriaDTO(
+        skills=skills,
+        skills_match=skills_match,
+        min_level=min_level,
+        work_experience=work_experience,
+        interests=interests,
+    )
+
+    return await service.search_profiles(
+        dto,
+        limit=limit,
+        cursor=cursor,
+        count_mode=count,
+    )
+
+
+@router.get("/export")
+async def export_profiles(
+    request: Request,
+    format: ExportFormat = Query(default=ExportFormat.NDJSON),
     skills: list[str] = Query(default=[]),
+    skills_match: SkillMatch = Query(default=SkillMatch.ANY),
+    min_level: Optional[SkillLevel] = Query(default=None),
     work_experience: int = Query(default=0, ge=0),
     interests: list[str] = Query(default=[]),
 ):
     dto = CriteriaDTO(
         skills=skills,
+        skills_match=skills_match,
+        min_level=min_level,
         work_experience=work_experience,
         interests=interests,
     )
 
-    return await service.search_profiles(dto)
+    # the body is sent after the request sessions are closed, so the rows are
+    # read from a session the stream opens and closes itself
+    async def rows():
+        async with open_read_session(request) as session:
+            service = ProfileService(session, skill_catalog)
+            async for profile in service.stream_profiles(dto):
+                yield profile
+
+    return export_response(rows(), ProfileExportDTO, format, "profiles")
 
 
 @router.get("/me", response_model=ProfileDTO)
 async def get_me(
+    request: Request,
+    response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
     service: Annotated[ProfileService, Depends(get_profile_service)],
 ):
+    version = await service.get_profile_version(me=current_user)
+    etag = f'W/"profile-{current_user.id}-{version}"'
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
     return await service.get_my_profile(me=current_user)
 
 
@@ -52,11 +125,35 @@ async def update_profile(
     return await service.update_profile(me=current_user, dto=dto)
 
 
-@router.get("/skills")
+@router.get("/skills", response_model=SkillListDTO)
 async def get_allowed_skills(
+    request: Request,
+    catalog: Annotated[SkillCatalog, Depends(get_skill_catalog)],
+):
+    headers = {"Cache-Control": f"public, max-age={settings.SKILL_CATALOG_MAX_AGE}"}
+    # answered from memory, a db session is only opened to (re)load the catalog
+    if is_not_modified(request, catalog.etag):
+        return not_modified(catalog.etag, headers)
+
+    body, etag = await catalog.get_body()
+    # an expired catalog reloads unchanged more often than not
+    if is_not_modified(request, etag):
+        return not_modified(etag, headers)
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**headers, "ETag": etag},
+    )
+
+
+@router.put("/me/skills", response_model=ProfileSkillListDTO)
+async def set_profile_skills(
+    current_user: Annotated[User, Depends(get_current_user)],
     service: Annotated[ProfileService, Depends(get_profile_service)],
+    dto: ProfileSkillsSetDTO,
 ):
-    return {"skills": await service.get_allowed_skills()}
+    return await service.set_profile_skills(me=current_user, dto=dto)
 
 
 @router.post("/me/skills/{skill_id:int}", response_model=ProfileDTO)
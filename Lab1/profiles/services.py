@@ -1,23 +1,55 @@
+from typing import AsyncIterator, Optional
 from fastapi import HTTPException, status
-from sqlalchemy import exists, or_, select
+from sqlalchemy import (
+    Float,
+    FromClause,
+    Subquery,
+    delete,
+    exists,
+    func,
+    join,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings
+from core.pagination import decode_cursor, encode_cursor
+from core.writes import insert_returning, update_returning
+from profiles.catalog import SkillCatalog
 from profiles.dtos import (
+    CountMode,
     CriteriaDTO,
     ProfileCreateDTO,
     ProfileDTO,
+    ProfileExportDTO,
     ProfileListDTO,
+    ProfileSkillDTO,
+    ProfileSkillListDTO,
+    ProfileSkillsSetDTO,
     ProfileUpdateDTO,
     SkillDTO,
+    SkillMatch,
+)
+from profiles.models import (
+    Profile,
+    ProfileSkill,
+    Skill,
+    SkillLevel,
+    about_me_document,
+    interests_query,
 )
-from profiles.models import Profile, ProfileSkill, Skill
 from users.dtos import UserDTO
+from users.models import User
 
 
 class ProfileService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, skill_catalog: SkillCatalog):
         self._session = session
+        self._skill_catalog = skill_catalog
 
     async def get_my_profile(self, me: UserDTO) -> ProfileDTO:
         stmt = (
@@ -38,6 +70,17 @@ class ProfileService:
 
         return ProfileDTO.model_validate(profile)
 
+    async def get_profile_version(self, me: UserDTO) -> int:
+        stmt = select(Profile.version).where(Profile.user_id == me.id)
+        version = (await self._session.execute(stmt)).scalar()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profile not found",
+            )
+
+        return version
+
     async def create_profile(self, me: UserDTO, dto: ProfileCreateDTO) -> ProfileDTO:
         stmt = exists().where(Profile.user_id == me.id).select()
         is_exists = (await self._session.execute(stmt)).scalar()
@@ -47,69 +90,172 @@ class ProfileService:
                 detail="Profile has already been created",
             )
 
-        new_profile = Profile(**dto.model_dump(), user_id=me.id)
-        self._session.add(new_profile)
-        await self._session.commit()
-        await self._session.refresh(new_profile)
+        new_profile = await insert_returning(
+            self._session,
+            Profile,
+            {**dto.model_dump(), "user_id": me.id},
+        )
 
-        return ProfileDTO.model_validate(new_profile)
+        return ProfileDTO.model_validate({**new_profile._mapping, "user": me})
 
     async def update_profile(self, me: UserDTO, dto: ProfileUpdateDTO) -> ProfileDTO:
-        stmt = select(Profile).where(Profile.user_id == me.id)
-        profile = (await self._session.execute(stmt)).scalar()
+        profile = await update_returning(
+            self._session,
+            Profile,
+            {**dto.model_dump(exclude_unset=True), "version": Profile.version + 1},
+            Profile.user_id == me.id,
+        )
+
         if profile is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Profile not found",
             )
 
-        dict_dto = dto.model_dump(exclude_unset=True)
-        for key, value in dict_dto.items():
-            setattr(profile, key, value)
+        stmt = (
+            select(Skill)
+            .join(ProfileSkill, ProfileSkill.skill_id == Skill.id)
+            .where(ProfileSkill.profile_id == profile.id)
+        )
+
+        skills = (await self._session.execute(stmt)).scalars().all()
 
-        self._session.add(profile)
-        await self._session.commit()
-        await self._session.refresh(profile)
+        return ProfileDTO.model_validate(
+            {**profile._mapping, "user": me, "skills": skills}
+        )
 
-        return ProfileDTO.model_validate(profile)
+    async def search_profiles(
+        self,
+        dto: CriteriaDTO,
+        limit: int,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.CAPPED,
+    ) -> ProfileListDTO:
+        source, search_list, sort_keys = await self._search_criteria(dto)
+        total, total_is_exact = await self._count_profiles(
+            source,
+            search_list,
+            count_mode,
+        )
 
-    async def search_profiles(self, dto: CriteriaDTO) -> ProfileListDTO:
+        stmt = (
+            select(Profile, *sort_keys)
+            .select_from(source)
+            .where(*search_list)
+            .order_by(*(key.desc() for key in sort_keys))
+            .limit(limit + 1)
+        )
+
+        after = decode_cursor(
+            cursor,
+            tuple(key.type.python_type for key in sort_keys),
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(*sort_keys) < tuple_(*after))
+
+        rows = (await self._session.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(list(rows[-1][1:]))
+
+        return ProfileListDTO(
+            total=total,
+            total_is_exact=total_is_exact,
+            next_cursor=next_cursor,
+            profiles=[ProfileDTO.model_validate(row[0]) for row in rows],
+        )
+
+    async def stream_profiles(
+        self, dto: CriteriaDTO
+    ) -> AsyncIterator[ProfileExportDTO]:
+        source, search_list, sort_keys = await self._search_criteria(dto)
+        stmt = (
+            select(
+                Profile.user_id,
+                User.email,
+                Profile.first_name,
+                Profile.last_name,
+                Profile.birthdate,
+                Profile.about_me,
+                Profile.work_experience,
+            )
+            .select_from(source)
+            .join(User, User.id == Profile.user_id)
+            .where(*search_list)
+            .order_by(*(key.desc() for key in sort_keys))
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        # a server side cursor, rows are fetched batch by batch as they are sent
+        result = await self._session.stream(stmt)
+        async for row in result:
+            yield ProfileExportDTO.model_validate(row)
+
+    async def _search_criteria(
+        self, dto: CriteriaDTO
+    ) -> tuple[FromClause, list, list]:
         search_list = []
         if dto.work_experience:
             search_list.append(Profile.work_experience >= dto.work_experience)
 
+        # keyset pagination, every sort key is descending so that the page
+        # boundary is a single row value comparison
+        source, sort_keys = Profile, [Profile.id]
+        if dto.interests:
+            document, query = about_me_document(), interests_query(dto.interests)
+            search_list.append(document.op("@@")(query))
+            sort_keys.insert(0, func.ts_rank_cd(document, query, type_=Float))
+
         if dto.skills:
-            search_list.append(
-                select(ProfileSkill)
-                .join(Skill, ProfileSkill.skill_id == Skill.id)
-                .where(
-                    Skill.name.in_(dto.skills),
-                    ProfileSkill.profile_id == Profile.id,
-                )
-                .exists()
-            )
+            matched = await self._match_skills(dto)
+            source = join(Profile, matched, matched.c.profile_id == Profile.id)
+            sort_keys.insert(0, matched.c.matched)
 
-        if dto.interests:
-            search_list.append(
-                or_(
-                    *[
-                        Profile.about_me.like(f"%{interest}%")
-                        for interest in dto.interests
-                    ]
-                )
-            )
+        return source, search_list, sort_keys
 
-        stmt = select(Profile).where(*search_list)
-        profiles = (await self._session.execute(stmt)).scalars().all()
-        return ProfileListDTO(
-            total=len(profiles),
-            profiles=[ProfileDTO.model_validate(profile) for profile in profiles],
+    async def _match_skills(self, dto: CriteriaDTO) -> Subquery:
+        # profile_id => number of the requested skills the profile has, read
+        # from the (skill_id, level, profile_id) index alone
+        skills = await self._skill_catalog.get_skills_by_name(dto.skills)
+        stmt = (
+            select(ProfileSkill.profile_id, func.count().label("matched"))
+            .where(ProfileSkill.skill_id.in_([skill.id for skill in skills]))
+            .group_by(ProfileSkill.profile_id)
         )
 
+        if dto.min_level is not None:
+            levels = list(SkillLevel)
+            stmt = stmt.where(
+                ProfileSkill.level.in_(levels[levels.index(dto.min_level) :])
+            )
+
+        if dto.skills_match == SkillMatch.ALL:
+            # an unknown skill can not be matched by anyone
+            required = len(set(dto.skills))
+            stmt = stmt.having(func.count() == required)
+
+        return stmt.subquery()
+
+    async def _count_profiles(
+        self, source: FromClause, search_list: list, count_mode: CountMode
+    ) -> tuple[Optional[int], bool]:
+        if count_mode == CountMode.NONE:
+            return None, False
+
+        matches = select(Profile.id).select_from(source).where(*search_list)
+        if count_mode == CountMode.CAPPED:
+            matches = matches.limit(settings.SEARCH_COUNT_CAP + 1)
+
+        stmt = select(func.count()).select_from(matches.subquery())
+        total = (await self._session.execute(stmt)).scalar()
+        if total > settings.SEARCH_COUNT_CAP and count_mode == CountMode.CAPPED:
+            return settings.SEARCH_COUNT_CAP, False
+
+        return total, True
+
     async def get_allowed_skills(self) -> list[SkillDTO]:
-        stmt = select(Skill)
-        skills = (await self._session.execute(stmt)).scalars().all()
-        return [SkillDTO.model_validate(skill) for skill in skills]
+        return await self._skill_catalog.get_skills()
 
     async def add_profile_skill(self, me: UserDTO, skill_id: int) -> ProfileDTO:
         stmt = select(Profile).where(Profile.user_id == me.id)
@@ -120,23 +266,22 @@ class ProfileService:
                 detail="Profile not found",
             )
 
-        stmt = select(Skill).where(Skill.id == skill_id)
-        skill = (await self._session.execute(stmt)).scalar()
+        skill = await self._skill_catalog.get_skill(skill_id)
         if skill is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Skill not found",
             )
 
-        if skill in profile.skills:
+        if any(profile_skill.id == skill_id for profile_skill in profile.skills):
             return ProfileDTO.model_validate(profile)
 
-        profile.skills.append(skill)
-        self._session.add(profile)
-        await self._session.commit()
-        await self._session.refresh(profile)
+        stmt = insert(ProfileSkill).values(profile_id=profile.id, skill_id=skill_id)
+        await self._session.execute(stmt)
+        await self._touch_profile(profile.id)
 
-        return ProfileDTO.model_validate(profile)
+        profile_dto = ProfileDTO.model_validate(profile)
+        return profile_dto.model_copy(update={"skills": [*profile_dto.skills, skill]})
 
     async def remove_profile_skill(self, me: UserDTO, skill_id: int) -> ProfileDTO:
         stmt = select(Profile).where(Profile.user_id == me.id)
@@ -147,20 +292,85 @@ class ProfileService:
                 detail="Profile not found",
             )
 
-        stmt = select(Skill).where(Skill.id == skill_id)
-        skill = (await self._session.execute(stmt)).scalar()
+        skill = await self._skill_catalog.get_skill(skill_id)
         if skill is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Skill not found",
             )
 
-        if skill not in profile.skills:
+        if not any(profile_skill.id == skill_id for profile_skill in profile.skills):
             return ProfileDTO.model_validate(profile)
 
-        profile.skills.remove(skill)
-        self._session.add(profile)
-        await self._session.commit()
-        await self._session.refresh(profile)
+        stmt = delete(ProfileSkill).where(
+            ProfileSkill.profile_id == profile.id,
+            ProfileSkill.skill_id == skill_id,
+        )
 
-        return ProfileDTO.model_validate(profile)
+        await self._session.execute(stmt)
+        await self._touch_profile(profile.id)
+
+        profile_dto = ProfileDTO.model_validate(profile)
+        skills = [skill for skill in profile_dto.skills if skill.id != skill_id]
+        return profile_dto.model_copy(update={"skills": skills})
+
+    async def set_profile_skills(
+        self, me: UserDTO, dto: ProfileSkillsSetDTO
+    ) -> ProfileSkillListDTO:
+        stmt = select(Profile.id).where(Profile.user_id == me.id)
+        profile_id = (await self._session.execute(stmt)).scalar()
+        if profile_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profile not found",
+            )
+
+        # the last level wins when a skill is listed more than once
+        levels = {skill.skill_id: skill.level for skill in dto.skills}
+        skills = []
+        for skill_id, level in levels.items():
+            skill = await self._skill_catalog.get_skill(skill_id)
+            if skill is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Skill not found",
+                )
+
+            skills.append(ProfileSkillDTO(id=skill.id, name=skill.name, level=level))
+
+        stmt = delete(ProfileSkill).where(
+            ProfileSkill.profile_id == profile_id,
+            ProfileSkill.skill_id.not_in(levels),
+        )
+
+        changed = (await self._session.execute(stmt)).rowcount
+        if levels:
+            stmt = insert(ProfileSkill).values(
+                [
+                    {"profile_id": profile_id, "skill_id": skill_id, "level": level}
+                    for skill_id, level in levels.items()
+                ]
+            )
+
+            # rows whose level is already right are neither written nor counted
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ProfileSkill.profile_id, ProfileSkill.skill_id],
+                set_={"level": stmt.excluded.level},
+                where=ProfileSkill.level != stmt.excluded.level,
+            )
+
+            changed += (await self._session.execute(stmt)).rowcount
+
+        if changed:
+            await self._touch_profile(profile_id)
+
+        return ProfileSkillListDTO(skills=skills)
+
+    async def _touch_profile(self, profile_id: int) -> None:
+        stmt = (
+            update(Profile)
+            .where(Profile.id == profile_id)
+            .values(version=Profile.version + 1)
+        )
+
+        await self._session.execute(stmt)
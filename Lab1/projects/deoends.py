@@ -2,7 +2,7 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.depends import get_session
+from core.depends import get_read_session, get_session
 from projects.services import ProjectService
 
 
@@ -10,3 +10,9 @@ def get_project_service(
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> ProjectService:
     return ProjectService(session)
+
+
+def get_read_project_service(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> ProjectService:
+    return ProjectService(session)
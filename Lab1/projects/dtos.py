@@ -1,6 +1,8 @@
 from datetime import date
 from typing import Optional
+from pydantic import SerializeAsAny
 from core.dtos import CoreDTO
+from teams.dtos import TeamDTO
 
 
 class ProjectBaseDTO(CoreDTO):
@@ -16,6 +18,16 @@ class ProjectDTO(ProjectBaseDTO):
     id: int
 
 
+class ProjectTeamsDTO(ProjectDTO):
+    teams: list[TeamDTO]
+
+
+class ProjectListDTO(CoreDTO):
+    next_cursor: Optional[str] = None
+    # ProjectTeamsDTO when the teams were requested
+    projects: list[SerializeAsAny[ProjectDTO]]
+
+
 class ProjectUpdateDTO(ProjectBaseDTO):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -20,10 +20,12 @@ class Workflow(SQLModel, table=True):
         ondelete="CASCADE",
     )
 
+    # the primary key leads with team_id, this covers lookups by project
     project_id: int = Field(
         foreign_key="project.id",
         primary_key=True,
         ondelete="CASCADE",
+        index=True,
     )
 
 
@@ -1,30 +1,32 @@
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Query
 
-from projects.deoends import get_project_service
+from core.config import settings
+from core.routing import FastJSONRoute
+from projects.deoends import get_project_service, get_read_project_service
 from projects.dtos import ProjectCreateDTO, ProjectUpdateDTO
 from projects.services import ProjectService
 from users.depends import get_current_user
 from users.dtos import UserDTO
 
-router = APIRouter(prefix="/projects")
+router = APIRouter(prefix="/projects", route_class=FastJSONRoute)
 
 
 @router.get("/")
 async def get_allowed_projects(
     current_user: Annotated[UserDTO, Depends(get_current_user)],
-    service: Annotated[ProjectService, Depends(get_project_service)],
-    limit: int = Query(default=100),
-    offset: Optional[int] = Query(default=None),
+    service: Annotated[ProjectService, Depends(get_read_project_service)],
+    limit: int = Query(default=100, ge=1, le=settings.PROJECT_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    include_teams: bool = Query(default=False),
 ):
-    projects = await service.get_allowed_projects(
+    return await service.get_allowed_projects(
         me=current_user,
         limit=limit,
-        offset=offset,
+        cursor=cursor,
+        include_teams=include_teams,
     )
 
-    return {"projects": projects}
-
 
 @router.post("/")
 async def create_project(
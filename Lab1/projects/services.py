@@ -1,9 +1,19 @@
+from collections import defaultdict
 from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import distinct, select
-
-from projects.dtos import ProjectCreateDTO, ProjectDTO, ProjectUpdateDTO
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from core.pagination import decode_cursor, encode_cursor
+from core.writes import insert_returning, update_returning
+from projects.dtos import (
+    ProjectCreateDTO,
+    ProjectDTO,
+    ProjectListDTO,
+    ProjectTeamsDTO,
+    ProjectUpdateDTO,
+)
 from projects.models import Project, Workflow
 from teams.models import Member, Team
 from users.dtos import UserDTO
@@ -14,56 +24,93 @@ class ProjectService:
         self._session = session
 
     async def get_allowed_projects(
-        self, me: UserDTO, limit: int, offset: Optional[int] = None
-    ) -> list[ProjectDTO]:
+        self,
+        me: UserDTO,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_teams: bool = False,
+    ) -> ProjectListDTO:
+        # a project is listed once however many of the user's teams work on it
+        is_allowed = (
+            select(Workflow.project_id)
+            .join(Member, Member.team_id == Workflow.team_id)
+            .where(Workflow.project_id == Project.id, Member.user_id == me.id)
+            .exists()
+        )
+
+        # plain columns, the owner and the teams are not loaded
         stmt = (
-            select(Project)
-            .join(Workflow, Workflow.project_id == Project.id)
-            .where(
-                Workflow.team_id.in_(
-                    select(Member.team_id).where(Member.user_id == me.id).subquery()
-                )
-            )
-            .limit(limit)
-            .offset(offset or 0)
+            select(Project.id, Project.name, Project.description, Project.deadline)
+            .where(is_allowed)
+            .order_by(Project.id)
+            .limit(limit + 1)
+        )
+
+        after = decode_cursor(cursor, (int,))
+        if after is not None:
+            stmt = stmt.where(Project.id > after[0])
+
+        rows = (await self._session.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].id])
+
+        if not include_teams:
+            projects = [ProjectDTO.model_validate(row) for row in rows]
+            return ProjectListDTO(next_cursor=next_cursor, projects=projects)
+
+        stmt = (
+            select(Workflow.project_id, Team)
+            .join(Team, Team.id == Workflow.team_id)
+            .where(Workflow.project_id.in_([row.id for row in rows]))
         )
 
-        projects = (await self._session.execute(stmt)).scalars().unique()
-        return [ProjectDTO.model_validate(project) for project in projects]
+        teams = defaultdict(list)
+        for project_id, team in (await self._session.execute(stmt)).all():
+            teams[project_id].append(team)
+
+        projects = [
+            ProjectTeamsDTO.model_validate({**row._mapping, "teams": teams[row.id]})
+            for row in rows
+        ]
+
+        return ProjectListDTO(next_cursor=next_cursor, projects=projects)
 
     async def create_project(self, me: UserDTO, dto: ProjectCreateDTO) -> ProjectDTO:
-        project = Project(**dto.model_dump(), owner_id=me.id)
-        self._session.add(project)
-        await self._session.commit()
-        await self._session.refresh(project)
+        project = await insert_returning(
+            self._session,
+            Project,
+            {**dto.model_dump(), "owner_id": me.id},
+        )
 
         return ProjectDTO.model_validate(project)
 
     async def update_project(
         self, me: UserDTO, project_id: int, dto: ProjectUpdateDTO
     ) -> ProjectDTO:
-        project = await self._session.get(Project, project_id)
-        if project is None:
+        stmt = select(Project.owner_id).where(Project.id == project_id)
+        owner_id = (await self._session.execute(stmt)).scalar()
+        if owner_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found",
             )
 
-        if project.owner_id != me.id:
+        if owner_id != me.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden",
             )
 
-        dict_dto = dto.model_dump(exclude_unset=True)
-        for key, value in dict_dto.items():
-            setattr(project, key, value)
+        updated_project = await update_returning(
+            self._session,
+            Project,
+            dto.model_dump(exclude_unset=True),
+            Project.id == project_id,
+        )
 
-        self._session.add(project)
-        await self._session.commit()
-        await self._session.refresh(project)
-
-        return ProjectDTO.model_validate(project)
+        return ProjectDTO.model_validate(updated_project)
 
     async def add_team_to_project(
         self, me: UserDTO, project_id: int, team_id: int
@@ -91,6 +138,10 @@ class ProjectService:
         if team in project.teams:
             return
 
-        workflow = Workflow(team_id=team_id, project_id=project_id)
-        self._session.add(workflow)
-        await self._session.commit()
+        # a concurrent request may link the team first, the savepoint keeps the
+        # rest of the request transaction usable when the insert conflicts
+        try:
+            async with self._session.begin_nested():
+                self._session.add(Workflow(team_id=team_id, project_id=project_id))
+        except IntegrityError:
+            return
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql
+
+from core.depends import connection
+from profiles.models import (
+    Profile,
+    ProfileSkill,
+    SkillLevel,
+    about_me_document,
+    interests_query,
+)
+from projects.models import Project, Workflow
+from teams.models import Member, Task, TaskStatus, Team
+
+# The hot service queries and the indexes that serve them. A query passes when
+# its plan has no sequential scan and uses one of its indexes. Plans depend on
+# the table statistics, so run it against a database seeded to production size:
+#
+#   python -m scripts.seed --users 1000000
+#   python -m scripts.check_plans
+#
+# On small development tables a seq scan legitimately wins. --force-index
+# disables seq scans, which only shows that the indexes are usable at all.
+CHECKS = [
+    (
+        "member role lookup",
+        select(Team.id, Member.role)
+        .outerjoin(Member, and_(Member.team_id == Team.id, Member.user_id == 1))
+        .where(Team.id == 1),
+        ("uq_member_team_id_user_id", "ix_member_user_id"),
+    ),
+    (
+        "allowed projects",
+        select(Project.id).where(
+            select(Workflow.project_id)
+            .join(Member, Member.team_id == Workflow.team_id)
+            .where(Workflow.project_id == Project.id, Member.user_id == 1)
+            .exists()
+        ),
+        ("ix_member_user_id",),
+    ),
+    (
+        "teams of projects",
+        select(Workflow.team_id).where(Workflow.project_id.in_([1, 2])),
+        ("ix_workflow_project_id",),
+    ),
+    (
+        "member tasks by status",
+        select(Task.id).where(Task.member_id == 1, Task.status == TaskStatus.BLOCKED),
+        ("ix_task_member_id_status", "ix_task_open_member_id_deadline"),
+    ),
+    (
+        "open member tasks by deadline",
+        select(Task.id)
+        .where(Task.member_id == 1, Task.status != TaskStatus.DONE)
+        .order_by(Task.deadline),
+        ("ix_task_open_member_id_deadline",),
+    ),
+    (
+        "team tasks",
+        select(Task.id, Task.status)
+        .join(Member, Member.id == Task.member_id)
+        .where(Member.team_id == 1),
+        ("ix_task_member_id_status", "ix_task_open_member_id_deadline"),
+    ),
+    (
+        # only a selective threshold is worth the index, a low one reads most rows
+        "profiles by long work experience",
+        select(Profile.id).where(Profile.work_experience >= 120),
+        ("ix_profile_work_experience",),
+    ),
+    (
+        "profiles by skills",
+        select(ProfileSkill.profile_id, func.count())
+        .where(
+            ProfileSkill.skill_id.in_([1, 2]),
+            ProfileSkill.level.in_([SkillLevel.INTERMEDIATE, SkillLevel.ADVANCED]),
+        )
+        .group_by(ProfileSkill.profile_id),
+        ("ix_profileskill_skill_id_level_profile_id",),
+    ),
+    (
+        "profiles by interests",
+        select(Profile.id).where(
+            about_me_document().op("@@")(interests_query(["python"]))
+        ),
+        ("ix_profile_about_me_fts",),
+    ),
+]
+
+
+async def check_plans(args: argparse.Namespace) -> bool:
+    is_ok = True
+    async with connection.get_sesion() as session:
+        db = await session.connection()
+        if args.force_index:
+            await db.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+        for name, stmt, indexes in CHECKS:
+            sql = stmt.compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={"literal_binds": True},
+            )
+
+            plan = (await db.exec_driver_sql(f"EXPLAIN {sql}")).scalars().all()
+            used = [index for index in indexes if any(index in line for line in plan)]
+            passed = bool(used) and not any("Seq Scan" in line for line in plan)
+            print(f"{'ok' if passed else 'FAIL':<4} {name} -> {', '.join(used) or '-'}")
+            if not passed:
+                is_ok = False
+                print("\n".join(f"     {line}" for line in plan))
+
+    await connection.close()
+    return is_ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the plans of hot queries")
+    parser.add_argument(
+        "--force-index",
+        action="store_true",
+        help="disable seq scans, for databases too small to be representative",
+    )
+    sys.exit(0 if asyncio.run(check_plans(parser.parse_args())) else 1)
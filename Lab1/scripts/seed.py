@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate, islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import SQLModel
+
+from core.config import settings
+from core.depends import connection
+from profiles.models import Profile, ProfileSkill, Skill, SkillLevel
+from projects.models import Project, Workflow
+from teams.models import Member, Role, Task, TaskStatus, Team
+from users.hashers import ScryptHasher
+from users.models import User
+
+# Synthetic production sized data, loaded with COPY through the asyncpg
+# connection of the app engine. Rows are generated lazily and copied in
+# batches, so memory stays flat whatever the volume. Ids are assigned here,
+# after the highest existing id, and the sequences are moved past them.
+#
+#   python -m scripts.seed --users 1000000
+
+WORDS = (
+    "python", "golang", "rust", "backend", "frontend", "distributed", "systems",
+    "data", "machine", "learning", "devops", "cloud", "security", "mobile",
+    "design", "product", "testing", "databases", "networking", "embedded",
+)
+
+OTHER_ROLES = [role.name for role in Role if role != Role.OWNER]
+LEVELS = [level.name for level in SkillLevel]
+STATUSES = [status.name for status in TaskStatus]
+STATUS_WEIGHTS = [2, 2, 1, 5]
+
+
+class Seeder:
+    def __init__(self, db: AsyncConnection, rng: random.Random, batch_size: int):
+        self._db = db
+        self._rng = rng
+        self._batch_size = batch_size
+        # naive utc, as the models store it
+        self._now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+    async def first_id(self, model: type[SQLModel]) -> int:
+        stmt = select(func.coalesce(func.max(model.__table__.c.id), 0))
+        return (await self._db.execute(stmt)).scalar() + 1
+
+    async def copy(
+        self,
+        model: type[SQLModel],
+        columns: tuple[str, ...],
+        records: Iterable[tuple],
+    ) -> int:
+        table = model.__table__
+        unknown = set(columns) - set(table.columns.keys())
+        if unknown:
+            raise ValueError(f"{table.name} has no columns {unknown}")
+
+        driver = (await self._db.get_raw_connection()).driver_connection
+        records, count, started_at = iter(records), 0, time.perf_counter()
+        while batch := list(islice(records, self._batch_size)):
+            await driver.copy_records_to_table(
+                table.name,
+                records=batch,
+                columns=columns,
+            )
+            count += len(batch)
+
+        elapsed = time.perf_counter() - started_at
+        print(f"{table.name:<14}{count:>12} rows {count / elapsed:>12.0f} rows/s")
+        return count
+
+    async def reset_sequence(self, model: type[SQLModel]) -> None:
+        table = model.__table__.name
+        await self._db.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'(SELECT coalesce(max(id), 1) FROM "{table}"))'
+        )
+
+    def timestamp(self, days: int = 3 * 365) -> datetime:
+        return self._now - timedelta(seconds=self._rng.randrange(days * 24 * 3600))
+
+    def users(self, first_id: int, count: int, password: str) -> Iterator[tuple]:
+        for user_id in range(first_id, first_id + count):
+            yield user_id, f"user{user_id}@seed.example", password, 0
+
+    def skills(self, first_id: int, count: int) -> Iterator[tuple]:
+        for skill_id in range(first_id, first_id + count):
+            yield skill_id, f"skill-{skill_id}"
+
+    def profiles(
+        self, first_id: int, user_ids: range, share: float
+    ) -> Iterator[tuple]:
+        profile_id = first_id
+        for user_id in user_ids:
+            if self._rng.random() >= share:
+                continue
+
+            yield (
+                profile_id,
+                user_id,
+                f"First{user_id}",
+                f"Last{user_id}",
+                date(1970, 1, 1) + timedelta(days=self._rng.randrange(40 * 365)),
+                " ".join(self._rng.sample(WORDS, self._rng.randint(3, 8))),
+                int(self._rng.expovariate(1 / 36)),
+                0,
+            )
+
+            profile_id += 1
+
+    def profile_skills(self, profile_ids: range, skill_ids: range) -> Iterator[tuple]:
+        # a few skills are far more popular than the long tail
+        weights = list(accumulate(1 / rank for rank in range(1, len(skill_ids) + 1)))
+        for profile_id in profile_ids:
+            count = self._rng.randint(0, 8)
+            chosen = set(self._rng.choices(skill_ids, cum_weights=weights, k=count))
+            for skill_id in chosen:
+                yield profile_id, skill_id, self._rng.choice(LEVELS)
+
+    def team_sizes(self, count: int, max_size: int) -> list[int]:
+        # pareto distributed: many teams of a handful, a few huge ones
+        return [
+            min(max_size, int(2 * self._rng.paretovariate(1.1)))
+            for _ in range(count)
+        ]
+
+    def teams(self, first_id: int, count: int) -> Iterator[tuple]:
+        for team_id in range(first_id, first_id + count):
+            yield team_id, f"Team {team_id}", self.timestamp(), 0
+
+    def members(
+        self,
+        first_id: int,
+        team_ids: range,
+        sizes: list[int],
+        user_ids: range,
+    ) -> Iterator[tuple]:
+        member_id = first_id
+        for team_id, size in zip(team_ids, sizes):
+            # sampling a range keeps only the picked ids in memory
+            for position, user_id in enumerate(self._rng.sample(user_ids, size)):
+                role = self._rng.choice(OTHER_ROLES)
+                if position == 0:
+                    role = Role.OWNER.name
+
+                yield member_id, user_id, team_id, role
+                member_id += 1
+
+    def tasks(
+        self, first_id: int, member_ids: range, per_member: int
+    ) -> Iterator[tuple]:
+        task_id = first_id
+        for member_id in member_ids:
+            for _ in range(self._rng.randint(0, 2 * per_member)):
+                created_at = self.timestamp()
+                status = self._rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+                deadline = None
+                if self._rng.random() < 0.7:
+                    days = self._rng.randint(1, 90)
+                    deadline = created_at.date() + timedelta(days=days)
+
+                yield (
+                    task_id,
+                    member_id,
+                    f"Task {task_id}",
+                    status,
+                    deadline,
+                    created_at,
+                    created_at + timedelta(hours=self._rng.randint(0, 240)),
+                )
+
+                task_id += 1
+
+    def projects(
+        self, first_id: int, count: int, user_ids: range
+    ) -> Iterator[tuple]:
+        for project_id in range(first_id, first_id + count):
+            deadline = None
+            if self._rng.random() < 0.5:
+                days = self._rng.randint(-180, 365)
+                deadline = self._now.date() + timedelta(days=days)
+
+            yield (
+                project_id,
+                f"Project {project_id}",
+                " ".join(self._rng.sample(WORDS, 5)),
+                deadline,
+                self._rng.choice(user_ids),
+            )
+
+    def workflows(self, project_ids: range, team_ids: range) -> Iterator[tuple]:
+        for project_id in project_ids:
+            count = min(self._rng.randint(1, 3), len(team_ids))
+            for team_id in self._rng.sample(team_ids, count):
+                yield team_id, project_id
+
+
+async def seed(args: argparse.Namespace) -> None:
+    hasher = ScryptHasher(
+        n=settings.PASSWORD_SCRYPT_N,
+        r=settings.PASSWORD_SCRYPT_R,
+        p=settings.PASSWORD_SCRYPT_P,
+    )
+
+    # every seeded user signs in with the same password
+    password = hasher.hash(args.password)
+
+    async with connection.get_sesion() as session:
+        db = await session.connection()
+        seeder = Seeder(db, random.Random(args.seed), args.batch_size)
+
+        first_user = await seeder.first_id(User)
+        await seeder.copy(
+            User,
+            ("id", "email", "password", "token_version"),
+            seeder.users(first_user, args.users, password),
+        )
+
+        user_ids = range(first_user, first_user + args.users)
+
+        first_skill = await seeder.first_id(Skill)
+        await seeder.copy(
+            Skill,
+            ("id", "name"),
+            seeder.skills(first_skill, args.skills),
+        )
+
+        skill_ids = range(first_skill, first_skill + args.skills)
+
+        first_profile = await seeder.first_id(Profile)
+        profiles = await seeder.copy(
+            Profile,
+            (
+                "id",
+                "user_id",
+                "first_name",
+                "last_name",
+                "birthdate",
+                "about_me",
+                "work_experience",
+                "version",
+            ),
+            seeder.profiles(first_profile, user_ids, args.profile_share),
+        )
+
+        await seeder.copy(
+            ProfileSkill,
+            ("profile_id", "skill_id", "level"),
+            seeder.profile_skills(
+                range(first_profile, first_profile + profiles),
+                skill_ids,
+            ),
+        )
+
+        teams = max(args.users // args.users_per_team, 1)
+        first_team = await seeder.first_id(Team)
+        await seeder.copy(
+            Team,
+            ("id", "name", "created_at", "version"),
+            seeder.teams(first_team, teams),
+        )
+
+        team_ids = range(first_team, first_team + teams)
+        sizes = seeder.team_sizes(teams, min(args.max_team_size, args.users))
+
+        first_member = await seeder.first_id(Member)
+        members = await seeder.copy(
+            Member,
+            ("id", "user_id", "team_id", "role"),
+            seeder.members(first_member, team_ids, sizes, user_ids),
+        )
+
+        first_task = await seeder.first_id(Task)
+        await seeder.copy(
+            Task,
+            (
+                "id",
+                "member_id",
+                "description",
+                "status",
+                "deadline",
+                "created_at",
+                "updated_at",
+            ),
+            seeder.tasks(
+                first_task,
+                range(first_member, first_member + members),
+                args.tasks_per_member,
+            ),
+        )
+
+        projects = max(teams // 2, 1)
+        first_project = await seeder.first_id(Project)
+        await seeder.copy(
+            Project,
+            ("id", "name", "description", "deadline", "owner_id"),
+            seeder.projects(first_project, projects, user_ids),
+        )
+
+        await seeder.copy(
+            Workflow,
+            ("team_id", "project_id"),
+            seeder.workflows(
+                range(first_project, first_project + projects),
+                team_ids,
+            ),
+        )
+
+        for model in (User, Skill, Profile, Team, Member, Task, Project):
+            await seeder.reset_sequence(model)
+
+        await session.commit()
+
+        # fresh statistics, otherwise the planner keeps the empty table plans
+        await (await session.connection()).exec_driver_sql("ANALYZE")
+        await session.commit()
+
+    await connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed Lab1 with synthetic data")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--skills", type=int, default=500)
+    parser.add_argument("--profile-share", type=float, default=0.8)
+    parser.add_argument("--users-per-team", type=int, default=20)
+    parser.add_argument("--max-team-size", type=int, default=50_000)
+    parser.add_argument("--tasks-per-member", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(seed(parser.parse_args()))
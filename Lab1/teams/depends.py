@@ -2,17 +2,30 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.depends import get_session
+from core.cache import LRUCache, register_cache
+from core.config import settings
+from core.depends import get_read_session, get_session
 from teams.models import Role
 from teams.services import TeamService
 from users.depends import get_current_user
 from users.dtos import UserDTO
 
+role_cache = register_cache(
+    "team_role",
+    LRUCache(maxsize=settings.TEAM_ROLE_CACHE_SIZE, ttl=settings.TEAM_ROLE_CACHE_TTL),
+)
+
 
 def get_team_service(
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> TeamService:
-    return TeamService(session)
+    return TeamService(session, role_cache)
+
+
+def get_read_team_service(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> TeamService:
+    return TeamService(session, role_cache)
 
 
 async def check_user_is_member(
@@ -2,6 +2,7 @@ from datetime import date, datetime
 from typing import Annotated, Optional
 
 from sqlmodel import Field
+from core.config import settings
 from core.dtos import CoreDTO
 from teams.models import Role, TaskStatus
 from users.dtos import UserDTO
@@ -23,17 +24,41 @@ class MemberDTO(CoreDTO):
     role: Role
 
 
+class MemberListDTO(CoreDTO):
+    members: list[MemberDTO]
+
+
 class MemberAddDTO(CoreDTO):
     user_id: int
     role: Role
 
 
+class MemberBulkAddDTO(CoreDTO):
+    members: Annotated[
+        list[MemberAddDTO],
+        Field(min_length=1, max_length=settings.MEMBER_BULK_MAX_SIZE),
+    ]
+
+
+class MemberBulkResultDTO(CoreDTO):
+    added: list[MemberDTO]
+    existing: list[int]
+    missing: list[int]
+
+
 class TaskCreateDTO(CoreDTO):
     member_id: int
     description: Annotated[str, Field(max_length=500, default="")]
     deadline: Optional[date] = None
 
 
+class TaskBulkCreateDTO(CoreDTO):
+    tasks: Annotated[
+        list[TaskCreateDTO],
+        Field(min_length=1, max_length=settings.TASK_BULK_MAX_SIZE),
+    ]
+
+
 class TaskUpdateDTO(CoreDTO):
     status: Optional[TaskStatus] = None
     description: Annotated[Optional[str], Field(max_length=500)] = None
@@ -47,3 +72,44 @@ class TaskDTO(CoreDTO):
     created_at: datetime
     updated_at: datetime
     deadline: Optional[date] = None
+
+
+class TaskListDTO(CoreDTO):
+    tasks: list[TaskDTO]
+
+
+class TaskFilterDTO(CoreDTO):
+    statuses: list[TaskStatus] = []
+    member_id: Optional[int] = None
+    deadline_from: Optional[date] = None
+    deadline_to: Optional[date] = None
+
+
+class TaskBoardDTO(CoreDTO):
+    next_cursor: Optional[str] = None
+    # every status of the filtered tasks, whatever statuses were asked for
+    counts: dict[TaskStatus, int]
+    tasks: list[TaskDTO]
+
+
+class TaskExportDTO(CoreDTO):
+    id: int
+    member_id: int
+    user_id: int
+    email: str
+    role: Role
+    description: str
+    status: TaskStatus
+    created_at: datetime
+    updated_at: datetime
+    deadline: Optional[date] = None
+
+
+class TaskBulkErrorDTO(CoreDTO):
+    index: int
+    detail: str
+
+
+class TaskBulkResultDTO(CoreDTO):
+    tasks: list[TaskDTO]
+    errors: list[TaskBulkErrorDTO]
@@ -2,6 +2,7 @@ from datetime import date, datetime, timezone
 from enum import StrEnum
 from typing import Optional
 
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import Field, Relationship
 from core.models import CoreModel
 from users.models import User
@@ -28,9 +29,17 @@ class Team(CoreModel, table=True):
         default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None)
     )
 
+    # bumped on every change of the team members or tasks
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
 
 class Member(CoreModel, table=True):
-    user_id: int = Field(foreign_key="user.id", ondelete="CASCADE")
+    # also serves the (team_id, user_id) role lookup
+    __table_args__ = (
+        UniqueConstraint("team_id", "user_id", name="uq_member_team_id_user_id"),
+    )
+
+    user_id: int = Field(foreign_key="user.id", ondelete="CASCADE", index=True)
     team_id: int = Field(foreign_key="team.id", ondelete="CASCADE")
     role: Role
 
@@ -40,6 +49,17 @@ class Member(CoreModel, table=True):
 
 
 class Task(CoreModel, table=True):
+    __table_args__ = (
+        Index("ix_task_member_id_status", "member_id", "status"),
+        # open work is what boards and reminders read, done tasks only pile up
+        Index(
+            "ix_task_open_member_id_deadline",
+            "member_id",
+            "deadline",
+            postgresql_where=text("status <> 'DONE'"),
+        ),
+    )
+
     member_id: Optional[int] = Field(
         foreign_key="member.id",
         nullable=True,
@@ -57,3 +77,10 @@ class Task(CoreModel, table=True):
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None)
     )
+
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        sa_column_kwargs={
+            "onupdate": lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        },
+    )
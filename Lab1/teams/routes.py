@@ -1,13 +1,40 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends
-
-from teams.depends import check_user_is_member, check_user_is_owner, get_team_service
-from teams.dtos import MemberAddDTO, TaskCreateDTO, TaskUpdateDTO, TeamCreateDTO
+from datetime import date
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+
+from core.config import settings
+from core.depends import open_read_session
+from core.export import ExportFormat, export_response
+from core.http import is_not_modified, not_modified
+from core.routing import FastJSONRoute
+from teams.depends import (
+    check_user_is_member,
+    check_user_is_owner,
+    get_read_team_service,
+    get_team_service,
+    role_cache,
+)
+from teams.dtos import (
+    MemberAddDTO,
+    MemberBulkAddDTO,
+    MemberBulkResultDTO,
+    MemberListDTO,
+    TaskBoardDTO,
+    TaskBulkCreateDTO,
+    TaskBulkResultDTO,
+    TaskCreateDTO,
+    TaskExportDTO,
+    TaskFilterDTO,
+    TaskListDTO,
+    TaskUpdateDTO,
+    TeamCreateDTO,
+)
+from teams.models import TaskStatus
 from teams.services import TeamService
 from users.depends import get_current_user
 from users.dtos import UserDTO
 
-router = APIRouter(prefix="/teams")
+router = APIRouter(prefix="/teams", route_class=FastJSONRoute)
 
 
 @router.post("/")
@@ -19,13 +46,24 @@ async def create_team(
     return await service.create_team(me=curent_user, dto=dto)
 
 
-@router.get("/{team_id}/members", dependencies=[Depends(check_user_is_member)])
+@router.get(
+    "/{team_id}/members",
+    response_model=MemberListDTO,
+    dependencies=[Depends(check_user_is_member)],
+)
 async def get_team_members(
     team_id: int,
-    service: Annotated[TeamService, Depends(get_team_service)],
+    request: Request,
+    response: Response,
+    service: Annotated[TeamService, Depends(get_read_team_service)],
 ):
+    etag = f'W/"team-{team_id}-{await service.get_team_version(team_id)}"'
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
     members = await service.get_team_members(team_id)
-    return {"members": members}
+    response.headers["ETag"] = etag
+    return MemberListDTO(members=members)
 
 
 @router.post("/{team_id}/members", dependencies=[Depends(check_user_is_owner)])
@@ -37,35 +75,135 @@ async def add_team_member(
     await service.add_team_member(team_id=team_id, dto=dto)
 
 
+@router.post(
+    "/{team_id}/members/bulk",
+    response_model=MemberBulkResultDTO,
+    dependencies=[Depends(check_user_is_owner)],
+)
+async def add_team_members(
+    team_id: int,
+    service: Annotated[TeamService, Depends(get_team_service)],
+    dto: MemberBulkAddDTO,
+):
+    return await service.add_team_members(team_id=team_id, dto=dto)
+
+
 @router.delete(
     "/{team_id}/members/{member_id}",
     dependencies=[Depends(check_user_is_owner)],
 )
 async def remove_team_member(
+    team_id: int,
     member_id: int,
     service: Annotated[TeamService, Depends(get_team_service)],
 ):
-    await service.remove_team_member(member_id)
+    await service.remove_team_member(team_id=team_id, member_id=member_id)
 
 
 @router.get(
     "/{team_id}/members/{member_id}/tasks",
+    response_model=TaskListDTO,
     dependencies=[Depends(check_user_is_member)],
 )
 async def get_member_tasks(
+    team_id: int,
     member_id: int,
-    service: Annotated[TeamService, Depends(get_team_service)],
+    request: Request,
+    response: Response,
+    service: Annotated[TeamService, Depends(get_read_team_service)],
 ):
-    tasks = await service.get_member_tasks(member_id)
-    return {"tasks": tasks}
+    # a member of another team is a 404, not a 304
+    version = await service.get_member_version(team_id=team_id, member_id=member_id)
+    etag = f'W/"team-{team_id}-{version}-member-{member_id}"'
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    tasks = await service.get_member_tasks(team_id=team_id, member_id=member_id)
+    response.headers["ETag"] = etag
+    return TaskListDTO(tasks=tasks)
+
+
+@router.get(
+    "/{team_id}/tasks",
+    response_model=TaskBoardDTO,
+    dependencies=[Depends(check_user_is_member)],
+)
+async def get_team_tasks(
+    team_id: int,
+    service: Annotated[TeamService, Depends(get_read_team_service)],
+    status: list[TaskStatus] = Query(default=[]),
+    member_id: Optional[int] = Query(default=None),
+    deadline_from: Optional[date] = Query(default=None),
+    deadline_to: Optional[date] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=settings.TASK_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+):
+    dto = TaskFilterDTO(
+        statuses=status,
+        member_id=member_id,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+    )
+
+    return await service.get_team_tasks(
+        team_id=team_id,
+        dto=dto,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+@router.get(
+    "/{team_id}/tasks/export",
+    dependencies=[Depends(check_user_is_member)],
+)
+async def export_team_tasks(
+    team_id: int,
+    request: Request,
+    format: ExportFormat = Query(default=ExportFormat.NDJSON),
+    status: list[TaskStatus] = Query(default=[]),
+    member_id: Optional[int] = Query(default=None),
+    deadline_from: Optional[date] = Query(default=None),
+    deadline_to: Optional[date] = Query(default=None),
+):
+    dto = TaskFilterDTO(
+        statuses=status,
+        member_id=member_id,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+    )
+
+    # the body is sent after the request sessions are closed, so the rows are
+    # read from a session the stream opens and closes itself
+    async def rows():
+        async with open_read_session(request) as session:
+            service = TeamService(session, role_cache)
+            async for task in service.stream_team_tasks(team_id=team_id, dto=dto):
+                yield task
+
+    return export_response(rows(), TaskExportDTO, format, f"team-{team_id}-tasks")
 
 
 @router.post("/{team_id}/tasks", dependencies=[Depends(check_user_is_member)])
 async def create_task(
+    team_id: int,
     service: Annotated[TeamService, Depends(get_team_service)],
     dto: TaskCreateDTO,
 ):
-    return await service.create_task(dto)
+    return await service.create_task(team_id=team_id, dto=dto)
+
+
+@router.post(
+    "/{team_id}/tasks/bulk",
+    response_model=TaskBulkResultDTO,
+    dependencies=[Depends(check_user_is_member)],
+)
+async def create_tasks(
+    team_id: int,
+    service: Annotated[TeamService, Depends(get_team_service)],
+    dto: TaskBulkCreateDTO,
+):
+    return await service.create_tasks(team_id=team_id, dto=dto)
 
 
 @router.patch(
@@ -73,8 +211,9 @@ async def create_task(
     dependencies=[Depends(check_user_is_member)],
 )
 async def update_task(
+    team_id: int,
     task_id: int,
     service: Annotated[TeamService, Depends(get_team_service)],
     dto: TaskUpdateDTO,
 ):
-    return await service.update_task(task_id=task_id, dto=dto)
+    return await service.update_task(team_id=team_id, task_id=task_id, dto=dto)
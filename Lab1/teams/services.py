@@ -1,27 +1,43 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 from fastapi import HTTPException, status
-from sqlalchemy import exists, select
+from sqlalchemy import Select, and_, exists, func, select, true, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-
+from core.cache import LRUCache
+from core.config import settings
+from core.database import on_commit
+from core.pagination import decode_cursor, encode_cursor
+from core.writes import insert_returning, update_returning
 from teams.dtos import (
     MemberAddDTO,
+    MemberBulkAddDTO,
+    MemberBulkResultDTO,
     MemberDTO,
+    TaskBulkCreateDTO,
+    TaskBulkErrorDTO,
+    TaskBoardDTO,
+    TaskBulkResultDTO,
     TaskCreateDTO,
     TaskDTO,
+    TaskExportDTO,
+    TaskFilterDTO,
     TaskUpdateDTO,
     TeamCreateDTO,
     TeamDTO,
 )
-from teams.models import Member, Role, Task, Team
+from teams.models import Member, Role, Task, TaskStatus, Team
 from users.dtos import UserDTO
 from users.models import User
 
+_NOT_CACHED = object()
+
 
 class TeamService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, role_cache: LRUCache):
         self._session = session
+        self._role_cache = role_cache
 
     async def check_user_has_role(
         self,
@@ -29,42 +45,43 @@ class TeamService:
         team_id: int,
         role: Optional[Role] = None,
     ) -> bool:
-        stmt = exists().where(Team.id == team_id).select()
-        is_team_exists = (await self._session.execute(stmt)).scalar()
-        if not is_team_exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found",
-            )
+        member_role = self._role_cache.get((me.id, team_id), _NOT_CACHED)
+        if member_role is _NOT_CACHED:
+            member_role = await self._get_member_role(user_id=me.id, team_id=team_id)
+            self._role_cache.set((me.id, team_id), member_role)
 
-        stmt = select(Member).where(Member.team_id == team_id, Member.user_id == me.id)
-        member = (await self._session.execute(stmt)).scalar()
-        if member is None:
+        if member_role is None:
             return False
 
         # role is None => any role
         if role is None:
             return True
 
-        return member.role == role
+        return member_role == role
 
     async def create_team(self, me: UserDTO, dto: TeamCreateDTO) -> TeamDTO:
-        team = Team(**dto.model_dump())
-        self._session.add(team)
-        await self._session.flush()
+        team = await insert_returning(self._session, Team, dto.model_dump())
+        member = {
+            "user_id": me.id,
+            "team_id": team.id,
+            "role": Role.OWNER,
+        }
 
-        member = Member(
-            user_id=me.id,
-            team_id=team.id,
-            role=Role.OWNER,
-        )
-
-        self._session.add(member)
-        await self._session.commit()
-        await self._session.refresh(team)
+        await self._session.execute(insert(Member).values(member))
 
         return TeamDTO.model_validate(team)
 
+    async def get_team_version(self, team_id: int) -> int:
+        stmt = select(Team.version).where(Team.id == team_id)
+        version = (await self._session.execute(stmt)).scalar()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Team not found",
+            )
+
+        return version
+
     async def get_team_members(self, team_id: int) -> list[MemberDTO]:
         stmt = (
             select(Member)
@@ -75,8 +92,30 @@ class TeamService:
         members = (await self._session.execute(stmt)).scalars().all()
         return [MemberDTO.model_validate(member) for member in members]
 
-    async def get_member_tasks(self, member_id: int) -> list[TaskDTO]:
-        stmt = exists().where(Member.id == member_id).select()
+    async def get_member_version(self, team_id: int, member_id: int) -> int:
+        # the team version, provided the member belongs to that team
+        stmt = (
+            select(Team.version)
+            .join(Member, Member.team_id == Team.id)
+            .where(Team.id == team_id, Member.id == member_id)
+        )
+
+        version = (await self._session.execute(stmt)).scalar()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Member not found",
+            )
+
+        return version
+
+    async def get_member_tasks(self, team_id: int, member_id: int) -> list[TaskDTO]:
+        stmt = (
+            exists()
+            .where(Member.id == member_id, Member.team_id == team_id)
+            .select()
+        )
+
         is_member_exist = (await self._session.execute(stmt)).scalar()
         if not is_member_exist:
             raise HTTPException(
@@ -84,10 +123,87 @@ class TeamService:
                 detail="Member not found",
             )
 
-        stmt = select(Task).where(Task.member_id == member_id)
+        stmt = (
+            select(Task)
+            .join(Member, Member.id == Task.member_id)
+            .where(Task.member_id == member_id, Member.team_id == team_id)
+        )
         tasks = (await self._session.execute(stmt)).scalars().all()
         return [TaskDTO.model_validate(task) for task in tasks]
 
+    async def get_team_tasks(
+        self,
+        team_id: int,
+        dto: TaskFilterDTO,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> TaskBoardDTO:
+        filtered = self._team_tasks(team_id, dto).cte("filtered")
+
+        # the status filter only narrows the page, the counts cover every status
+        counts = select(
+            *[
+                func.count().filter(filtered.c.status == task_status).label(task_status)
+                for task_status in TaskStatus
+            ]
+        ).subquery("counts")
+
+        page = select(filtered).order_by(filtered.c.id).limit(limit + 1)
+        if dto.statuses:
+            page = page.where(filtered.c.status.in_(dto.statuses))
+
+        after = decode_cursor(cursor, (int,))
+        if after is not None:
+            page = page.where(filtered.c.id > after[0])
+
+        page = page.subquery("page")
+
+        # the counts row always comes back, joined to each task of the page
+        stmt = (
+            select(counts, page, User.email)
+            .select_from(counts)
+            .outerjoin(page, true())
+            .outerjoin(User, User.id == page.c.user_id)
+            .order_by(page.c.id)
+        )
+
+        rows = (await self._session.execute(stmt)).all()
+        totals = rows[0]._mapping
+        board = {task_status: totals[task_status] for task_status in TaskStatus}
+        rows = [row for row in rows if row.id is not None]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].id])
+
+        tasks = []
+        for row in rows:
+            user = UserDTO(id=row.user_id, email=row.email)
+            member = MemberDTO(id=row.member_id, user=user, role=row.role)
+            tasks.append(TaskDTO.model_validate({**row._mapping, "member": member}))
+
+        return TaskBoardDTO(next_cursor=next_cursor, counts=board, tasks=tasks)
+
+    async def stream_team_tasks(
+        self, team_id: int, dto: TaskFilterDTO
+    ) -> AsyncIterator[TaskExportDTO]:
+        stmt = (
+            self._team_tasks(team_id, dto)
+            .add_columns(User.email)
+            .join(User, User.id == Member.user_id)
+            .order_by(Task.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        if dto.statuses:
+            stmt = stmt.where(Task.status.in_(dto.statuses))
+
+        # a server side cursor, rows are fetched batch by batch as they are sent
+        result = await self._session.stream(stmt)
+        async for row in result:
+            yield TaskExportDTO.model_validate(row)
+
     async def add_team_member(self, team_id: int, dto: MemberAddDTO) -> None:
         user = await self._session.get(User, dto.user_id)
         if user is None:
@@ -103,43 +219,166 @@ class TeamService:
                 detail="Team not found",
             )
 
+        # an existing membership is left as it is
         stmt = (
-            exists()
-            .where(Member.user_id == dto.user_id, Member.team_id == team_id)
-            .select()
+            insert(Member)
+            .values(**dto.model_dump(), team_id=team.id)
+            .on_conflict_do_nothing(constraint="uq_member_team_id_user_id")
+            .returning(Member.id)
         )
 
-        is_member_exist = (await self._session.execute(stmt)).scalar()
-        if is_member_exist:
+        if (await self._session.execute(stmt)).scalar() is None:
             return
 
-        member = Member(**dto.model_dump(), team_id=team.id)
-        self._session.add(member)
-        await self._session.commit()
+        await self._touch_team(team.id)
+        on_commit(self._session, lambda: self._role_cache.pop((dto.user_id, team_id)))
 
-    async def remove_team_member(self, member_id: int) -> None:
-        member = await self._session.get(Member, member_id)
-        if member is not None:
-            await self._session.delete(member)
+    async def add_team_members(
+        self, team_id: int, dto: MemberBulkAddDTO
+    ) -> MemberBulkResultDTO:
+        # the first pair wins when a user is listed more than once
+        roles: dict[int, Role] = {}
+        for member in dto.members:
+            roles.setdefault(member.user_id, member.role)
 
-    async def create_task(self, dto: TaskCreateDTO) -> TaskDTO:
-        stmt = exists().where(Member.id == dto.member_id).select()
-        is_member_exist = (await self._session.execute(stmt)).scalar()
-        if not is_member_exist:
+        # users and their current membership in one round trip
+        stmt = (
+            select(User.id, User.email, Member.id.label("member_id"))
+            .outerjoin(
+                Member,
+                and_(Member.user_id == User.id, Member.team_id == team_id),
+            )
+            .where(User.id.in_(roles))
+        )
+
+        users, existing = {}, []
+        for row in (await self._session.execute(stmt)).all():
+            if row.member_id is not None:
+                existing.append(row.id)
+            else:
+                users[row.id] = UserDTO(id=row.id, email=row.email)
+
+        missing = [
+            user_id
+            for user_id in roles
+            if user_id not in users and user_id not in existing
+        ]
+
+        if not users:
+            return MemberBulkResultDTO(added=[], existing=existing, missing=missing)
+
+        stmt = (
+            insert(Member)
+            .values(
+                [
+                    {"user_id": user_id, "team_id": team_id, "role": roles[user_id]}
+                    for user_id in users
+                ]
+            )
+            .on_conflict_do_nothing(constraint="uq_member_team_id_user_id")
+            .returning(Member.id, Member.user_id, Member.role)
+        )
+
+        # users added concurrently since the lookup are not returned
+        rows = (await self._session.execute(stmt)).all()
+        added_ids = {row.user_id for row in rows}
+        existing.extend(user_id for user_id in users if user_id not in added_ids)
+        await self._touch_team(team_id)
+
+        def forget_roles() -> None:
+            for user_id in users:
+                self._role_cache.pop((user_id, team_id))
+
+        on_commit(self._session, forget_roles)
+
+        added = [
+            MemberDTO(id=row.id, user=users[row.user_id], role=row.role)
+            for row in rows
+        ]
+
+        return MemberBulkResultDTO(added=added, existing=existing, missing=missing)
+
+    async def remove_team_member(self, team_id: int, member_id: int) -> None:
+        stmt = select(Member).where(Member.id == member_id, Member.team_id == team_id)
+        member = (await self._session.execute(stmt)).scalar()
+        # a member of another team is a 404 as well, the owner check is on team_id
+        if member is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Member not found",
+            )
+
+        await self._session.delete(member)
+        await self._touch_team(team_id)
+        key = (member.user_id, team_id)
+        on_commit(self._session, lambda: self._role_cache.pop(key))
+
+    async def create_task(self, team_id: int, dto: TaskCreateDTO) -> TaskDTO:
+        stmt = select(Member).where(
+            Member.id == dto.member_id,
+            Member.team_id == team_id,
+        )
+
+        member = (await self._session.execute(stmt)).scalar()
+        if member is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Member not found",
             )
 
-        task = Task(**dto.model_dump())
-        self._session.add(task)
-        await self._session.commit()
-        await self._session.refresh(task)
+        task = await insert_returning(self._session, Task, dto.model_dump())
+        await self._touch_team(team_id)
 
-        return TaskDTO.model_validate(task)
+        return TaskDTO.model_validate(
+            {**task._mapping, "member": MemberDTO.model_validate(member)}
+        )
+
+    async def create_tasks(
+        self, team_id: int, dto: TaskBulkCreateDTO
+    ) -> TaskBulkResultDTO:
+        member_ids = {task.member_id for task in dto.tasks}
+        stmt = select(Member).where(
+            Member.id.in_(member_ids),
+            Member.team_id == team_id,
+        )
+
+        members = {
+            member.id: member
+            for member in (await self._session.execute(stmt)).scalars().all()
+        }
+
+        values, errors = [], []
+        for index, task in enumerate(dto.tasks):
+            if task.member_id not in members:
+                errors.append(TaskBulkErrorDTO(index=index, detail="Member not found"))
+                continue
+
+            values.append(task.model_dump())
+
+        if not values:
+            return TaskBulkResultDTO(tasks=[], errors=errors)
+
+        # the whole batch goes out as one multi-row INSERT
+        stmt = insert(Task).values(values).returning(*Task.__table__.columns)
+        rows = (await self._session.execute(stmt)).all()
+        await self._touch_team(team_id)
+
+        tasks = []
+        for row in rows:
+            member = MemberDTO.model_validate(members[row.member_id])
+            tasks.append(TaskDTO.model_validate({**row._mapping, "member": member}))
+
+        return TaskBulkResultDTO(tasks=tasks, errors=errors)
+
+    async def update_task(
+        self, team_id: int, task_id: int, dto: TaskUpdateDTO
+    ) -> TaskDTO:
+        stmt = (
+            select(Task)
+            .join(Member, Member.id == Task.member_id)
+            .where(Task.id == task_id, Member.team_id == team_id)
+        )
 
-    async def update_task(self, task_id: int, dto: TaskUpdateDTO) -> TaskDTO:
-        stmt = select(Task).where(Task.id == task_id)
         task = (await self._session.execute(stmt)).scalar()
         if task is None:
             raise HTTPException(
@@ -147,12 +386,56 @@ class TeamService:
                 detail="Task not found",
             )
 
-        dict_dto = dto.model_dump(exclude_unset=True)
-        for key, value in dict_dto.items():
-            setattr(task, key, value)
+        updated_task = await update_returning(
+            self._session,
+            Task,
+            dto.model_dump(exclude_unset=True),
+            Task.id == task.id,
+        )
+
+        await self._touch_team(team_id)
+
+        member = MemberDTO.model_validate(task.member)
+        return TaskDTO.model_validate({**updated_task._mapping, "member": member})
+
+    async def _get_member_role(self, user_id: int, team_id: int) -> Optional[Role]:
+        # team existence and membership in one round trip, role is NULL for non members
+        stmt = (
+            select(Team.id, Member.role)
+            .outerjoin(
+                Member,
+                and_(Member.team_id == Team.id, Member.user_id == user_id),
+            )
+            .where(Team.id == team_id)
+            .limit(1)
+        )
+
+        row = (await self._session.execute(stmt)).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Team not found",
+            )
+
+        return row.role
+
+    def _team_tasks(self, team_id: int, dto: TaskFilterDTO) -> Select:
+        # every filter but the statuses
+        stmt = (
+            select(*Task.__table__.columns, Member.user_id, Member.role)
+            .join(Member, Member.id == Task.member_id)
+            .where(Member.team_id == team_id)
+        )
+
+        if dto.member_id is not None:
+            stmt = stmt.where(Task.member_id == dto.member_id)
+        if dto.deadline_from is not None:
+            stmt = stmt.where(Task.deadline >= dto.deadline_from)
+        if dto.deadline_to is not None:
+            stmt = stmt.where(Task.deadline <= dto.deadline_to)
 
-        self._session.add(task)
-        await self._session.commit()
-        await self._session.refresh(task)
+        return stmt
 
-        return TaskDTO.model_validate(task)
+    async def _touch_team(self, team_id: int) -> None:
+        stmt = update(Team).where(Team.id == team_id).values(version=Team.version + 1)
+        await self._session.execute(stmt)
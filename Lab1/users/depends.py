@@ -1,16 +1,43 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, Header, status
-from core.depends import get_session
+from core.cache import LRUCache, register_cache
+from core.config import settings
+from core.depends import connection, get_session
 from users.dtos import UserDTO
+from users.hashers import AsyncPasswordHasher, ScryptHasher, SHA256Hasher
 from users.services import UserService
 from sqlalchemy.ext.asyncio import AsyncSession
 
+token_cache = register_cache(
+    "token",
+    LRUCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL),
+)
+
+# user id => lowest token version still accepted, and when it was set
+token_versions: dict[int, tuple[int, datetime]] = {}
+
+password_hasher = AsyncPasswordHasher(
+    hasher=ScryptHasher(
+        n=settings.PASSWORD_SCRYPT_N,
+        r=settings.PASSWORD_SCRYPT_R,
+        p=settings.PASSWORD_SCRYPT_P,
+    ),
+    legacy_hashers=[SHA256Hasher()],
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    concurrency=settings.PASSWORD_HASH_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
 
 def get_user_service(
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> UserService:
-    return UserService(session)
+    return UserService(session, token_cache, token_versions, password_hasher)
 
 
 async def get_current_user(
@@ -41,3 +68,32 @@ async def get_current_user(
         )
 
     return await service.authenticate(token)
+
+
+# revocations committed up to this long after their timestamp are still seen
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+async def sync_token_versions(interval: float) -> None:
+    # cached and stateless tokens never hit the db, so revocations made by
+    # other workers have to be pulled periodically
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    since = now - timedelta(seconds=settings.JWT_TTL)
+    while True:
+        started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        try:
+            async with connection.get_sesion() as session:
+                service = UserService(
+                    session,
+                    token_cache,
+                    token_versions,
+                    password_hasher,
+                )
+
+                await service.load_token_versions(since)
+
+            since = started_at - REVOCATION_SYNC_OVERLAP
+        except Exception:
+            logger.exception("Failed to sync token versions")
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,144 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+class PasswordHasher(ABC):
+    @abstractmethod
+    def identifies(self, hashed: str) -> bool: ...
+
+    @abstractmethod
+    def hash(self, password: str) -> str: ...
+
+    @abstractmethod
+    def verify(self, password: str, hashed: str) -> bool: ...
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return False
+
+
+class SHA256Hasher(PasswordHasher):
+    # legacy unsalted hashes, kept only to verify and upgrade old passwords
+    def identifies(self, hashed: str) -> bool:
+        return len(hashed) == 64 and "$" not in hashed
+
+    def hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return hmac.compare_digest(self.hash(password), hashed)
+
+
+class ScryptHasher(PasswordHasher):
+    algorithm = "scrypt"
+
+    def __init__(self, n: int, r: int, p: int, salt_size: int = 16, dklen: int = 64):
+        self._n = n
+        self._r = r
+        self._p = p
+        self._salt_size = salt_size
+        self._dklen = dklen
+
+    def identifies(self, hashed: str) -> bool:
+        return hashed.startswith(f"{self.algorithm}$")
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self._salt_size)
+        key = self._derive(password, salt, self._n, self._r, self._p, self._dklen)
+        return "$".join(
+            (
+                self.algorithm,
+                str(self._n),
+                str(self._r),
+                str(self._p),
+                base64.b64encode(salt).decode(),
+                base64.b64encode(key).decode(),
+            )
+        )
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            _, n, r, p, salt, key = hashed.split("$")
+            salt, key = base64.b64decode(salt), base64.b64decode(key)
+            derived = self._derive(password, salt, int(n), int(r), int(p), len(key))
+        except ValueError:
+            return False
+
+        return hmac.compare_digest(derived, key)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        _, n, r, p, *_ = hashed.split("$")
+        return (int(n), int(r), int(p)) != (self._n, self._r, self._p)
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * n * r,
+            dklen=dklen,
+        )
+
+
+class AsyncPasswordHasher:
+    # hashing is CPU bound and hashlib releases the GIL while deriving keys,
+    # so it runs in a small pool instead of blocking the event loop
+    def __init__(
+        self,
+        hasher: PasswordHasher,
+        legacy_hashers: list[PasswordHasher],
+        max_workers: int,
+        concurrency: int,
+    ):
+        self._hasher = hasher
+        self._legacy_hashers = legacy_hashers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="password-hasher",
+        )
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._dummy_hash: Optional[str] = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hasher.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+        # the second item is a fresh hash when the stored one is outdated
+        for hasher in (self._hasher, *self._legacy_hashers):
+            if not hasher.identifies(hashed):
+                continue
+
+            if not await self._run(hasher.verify, password, hashed):
+                return False, None
+
+            if hasher is self._hasher and not hasher.needs_rehash(hashed):
+                return True, None
+
+            return True, await self.hash(password)
+
+        return False, None
+
+    async def verify_dummy(self, password: str) -> None:
+        # the same work as a real verify, so a missing account can not be told
+        # apart by the response time
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(os.urandom(16).hex())
+
+        await self._run(self._hasher.verify, password, self._dummy_hash)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
@@ -1,4 +1,6 @@
-from sqlmodel import SQLModel
+from datetime import datetime
+from typing import Optional
+from sqlmodel import Field, SQLModel
 
 from core.models import CoreModel
 
@@ -6,9 +8,18 @@ from core.models import CoreModel
 class User(CoreModel, table=True):
     email: str
     password: str
+    # bumped to revoke every token issued to the user
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # when token_version was last bumped, workers pull revocations made since
+    token_revoked_at: Optional[datetime] = Field(default=None, index=True)
 
 
 class JWTPayload(SQLModel):
     sub: str
     exp: float
     iat: float
+    ver: int = 0
+
+    # stateless claims, present only when APP_JWT_STATELESS is enabled
+    email: Optional[str] = None
+    claims_version: Optional[int] = None
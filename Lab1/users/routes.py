@@ -1,10 +1,11 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends
-from users.depends import get_user_service
-from users.dtos import UserCreateDTO, UserTokenDTO
+from core.routing import FastJSONRoute
+from users.depends import get_current_user, get_user_service
+from users.dtos import UserCreateDTO, UserDTO, UserTokenDTO
 from users.services import UserService
 
-router = APIRouter(prefix="/users")
+router = APIRouter(prefix="/users", route_class=FastJSONRoute)
 
 
 @router.post("/sign-up", response_model=UserTokenDTO)
@@ -21,3 +22,11 @@ async def sign_in(
     service: Annotated[UserService, Depends(get_user_service)],
 ):
     return await service.sign_in(dto)
+
+
+@router.post("/me/revoke-tokens")
+async def revoke_tokens(
+    current_user: Annotated[UserDTO, Depends(get_current_user)],
+    service: Annotated[UserService, Depends(get_user_service)],
+):
+    await service.revoke_tokens(me=current_user)
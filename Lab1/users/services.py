@@ -1,20 +1,36 @@
-from datetime import datetime, timezone
-import hashlib
+from datetime import datetime, timedelta, timezone
+import time
 
 import jwt
 from fastapi import HTTPException, status
-from sqlalchemy import exists, select
+from sqlalchemy import exists, select, update
 from users.dtos import UserCreateDTO, UserDTO, UserTokenDTO
+from users.hashers import AsyncPasswordHasher
 from users.models import JWTPayload, User
 from sqlalchemy.ext.asyncio import AsyncSession
+from core.cache import LRUCache
 from core.config import settings
+from core.database import on_commit
+from core.writes import insert_returning
 
 type JWT = str
 
+# bump when the set of stateless claims changes, older tokens fall back to the db
+CLAIMS_VERSION = 1
+
 
 class UserService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        token_cache: LRUCache,
+        token_versions: dict[int, tuple[int, datetime]],
+        password_hasher: AsyncPasswordHasher,
+    ):
         self._session = session
+        self._token_cache = token_cache
+        self._token_versions = token_versions
+        self._password_hasher = password_hasher
 
     async def sign_up(self, dto: UserCreateDTO) -> UserTokenDTO:
         stmt = exists().where(User.email == dto.email).select()
@@ -25,15 +41,15 @@ class UserService:
                 detail="Email occupied by another user",
             )
 
-        new_user = User(
-            email=dto.email,
-            password=self._hash_password(dto.password),
+        new_user = await insert_returning(
+            self._session,
+            User,
+            {
+                "email": dto.email,
+                "password": await self._password_hasher.hash(dto.password),
+            },
         )
 
-        self._session.add(new_user)
-        await self._session.commit()
-        await self._session.refresh(new_user)
-
         return UserTokenDTO(
             token=self._issue_token(new_user),
             user=UserDTO.model_validate(new_user),
@@ -42,20 +58,121 @@ class UserService:
     async def sign_in(self, dto: UserCreateDTO) -> UserTokenDTO:
         stmt = select(User).where(User.email == dto.email)
         user = (await self._session.execute(stmt)).scalar()
-        if (user is None) or (self._hash_password(dto.password) != user.password):
+        if user is None:
+            await self._password_hasher.verify_dummy(dto.password)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid email or password",
+            )
+
+        is_valid, new_hash = await self._password_hasher.verify(
+            dto.password,
+            user.password,
+        )
+
+        if not is_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
             )
 
+        if new_hash is not None:
+            user.password = new_hash
+            self._session.add(user)
+
         return UserTokenDTO(
             token=self._issue_token(user),
             user=UserDTO.model_validate(user),
         )
 
     async def authenticate(self, token: JWT) -> UserDTO:
+        # revocations reach other workers through token_versions only, so the
+        # version is checked on cache hits as well
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            cached_user, token_version = cached
+            self._check_token_version(cached_user.id, token_version)
+            return cached_user
+
         payload = self._verify_token(token)
-        stmt = select(User).where(User.id == int(payload.sub))
+        user_id = int(payload.sub)
+        self._check_token_version(user_id, payload.ver)
+
+        if settings.JWT_STATELESS and payload.claims_version == CLAIMS_VERSION:
+            user_dto = UserDTO(id=user_id, email=payload.email)
+        else:
+            user_dto = await self._load_token_user(user_id, payload)
+
+        # cached tokens must not outlive their exp claim
+        self._token_cache.set(
+            token,
+            (user_dto, payload.ver),
+            ttl=payload.exp - time.time(),
+        )
+
+        return user_dto
+
+    async def revoke_tokens(self, me: UserDTO) -> None:
+        stmt = (
+            update(User)
+            .where(User.id == me.id)
+            .values(
+                token_version=User.token_version + 1,
+                token_revoked_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+            .returning(User.token_version, User.token_revoked_at)
+        )
+
+        row = (await self._session.execute(stmt)).one()
+
+        # the tokens only count as revoked once the new version is committed
+        def remember_version() -> None:
+            self.invalidate_user(me.id)
+            self._remember_version(me.id, row.token_version, row.token_revoked_at)
+
+        on_commit(self._session, remember_version)
+
+    async def load_token_versions(self, since: datetime) -> None:
+        # only the users revoked since the last sync, read from the index
+        stmt = select(User.id, User.token_version, User.token_revoked_at).where(
+            User.token_revoked_at >= since
+        )
+
+        for row in await self._session.execute(stmt):
+            self._remember_version(row.id, row.token_version, row.token_revoked_at)
+
+        # tokens issued before a revocation older than their ttl have expired
+        expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+            seconds=settings.JWT_TTL
+        )
+
+        for user_id, (_, revoked_at) in list(self._token_versions.items()):
+            if revoked_at < expired:
+                del self._token_versions[user_id]
+
+    def invalidate_user(self, user_id: int) -> None:
+        # after a change to the user row its tokens are authenticated afresh
+        self._token_cache.evict(lambda _, cached: cached[0].id == user_id)
+        self._token_versions.pop(user_id, None)
+
+    def _remember_version(
+        self, user_id: int, token_version: int, revoked_at: datetime
+    ) -> None:
+        known_version, _ = self._token_versions.get(user_id, (0, revoked_at))
+        if known_version < token_version:
+            self._token_versions[user_id] = (token_version, revoked_at)
+
+    def _check_token_version(self, user_id: int, token_version: int) -> None:
+        known_version, _ = self._token_versions.get(user_id, (0, None))
+        if token_version < known_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    async def _load_token_user(self, user_id: int, payload: JWTPayload) -> UserDTO:
+        stmt = select(User).where(User.id == user_id)
         user = (await self._session.execute(stmt)).scalar()
         if user is None:
             raise HTTPException(
@@ -64,10 +181,17 @@ class UserService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return UserDTO.model_validate(user)
+        if user.token_revoked_at is not None:
+            self._remember_version(user.id, user.token_version, user.token_revoked_at)
 
-    def _hash_password(self, password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+        if payload.ver != user.token_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        return UserDTO.model_validate(user)
 
     def _issue_token(self, user: User) -> JWT:
         timestamp = datetime.now(timezone.utc).timestamp()
@@ -75,10 +199,15 @@ class UserService:
             sub=str(user.id),
             iat=timestamp,
             exp=timestamp + settings.JWT_TTL,
+            ver=user.token_version,
         )
 
+        if settings.JWT_STATELESS:
+            payload.email = user.email
+            payload.claims_version = CLAIMS_VERSION
+
         return jwt.encode(
-            payload=payload.model_dump(mode="json"),
+            payload=payload.model_dump(mode="json", exclude_none=True),
             key=settings.JWT_SECRET,
             algorithm="HS256",
         )